@@ -0,0 +1,5 @@
+from .availability import AvailabilityCache
+from .memory import AsyncTTLCache
+
+
+__all__ = [AsyncTTLCache, AvailabilityCache]
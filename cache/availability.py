@@ -0,0 +1,192 @@
+import json
+import logging
+
+from datetime import date, timedelta
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+
+logger = logging.getLogger(__name__)
+
+GEN_TTL = 86400  # время жизни счётчика поколений, секунды
+PREFIX = 'availability'
+STATS_EVERY = 500  # период вывода статистики, количество обращений
+TTL = 600  # время жизни закэшированной доступности, секунды
+
+# Записывает месяцы в хеш, только если с момента чтения поколения не было
+# инвалидации: иначе устаревшие данные из базы перезаписали бы сброс.
+_SET_IF_GEN = '''
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 3))
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+'''
+
+
+def _months(date_from: date, date_to: date) -> list[str]:
+    """
+    Месяцы 'YYYY-MM', пересекающиеся с полуинтервалом [date_from, date_to).
+    """
+
+    months: list[str] = []
+    current: date = date_from.replace(day=1)
+    while current < date_to:
+        months.append(current.isoformat()[:7])
+        current = (current + timedelta(days=31)).replace(day=1)
+
+    return months
+
+
+class AvailabilityCache:
+    """
+    Кэш свободных часов тренеров в Redis.
+
+    Для каждого тренера хранится хеш availability:{trainer_id}, поле
+    которого — месяц 'YYYY-MM', значение — JSON {'YYYY-MM-DD': [часы]}.
+    Месяц без свободных дней хранится как пустой объект, отсутствие
+    поля означает, что месяц не загружен. Записи на тренировки, их
+    отмена и публикация расписания сбрасывают хеш тренера методом
+    invalidate.
+    """
+
+    def __init__(self, redis: Redis, ttl: int = TTL):
+
+        self.redis = redis
+        self.ttl = ttl
+        self._set_if_gen = redis.register_script(_SET_IF_GEN)
+        self.hits: int = 0
+        self.misses: int = 0
+        self.errors: int = 0
+
+    @staticmethod
+    def _key(trainer_id: int) -> str:
+
+        return f'{PREFIX}:{trainer_id}'
+
+    @staticmethod
+    def _gen_key(trainer_id: int) -> str:
+
+        return f'{PREFIX}:{trainer_id}:gen'
+
+    async def get(
+        self,
+        trainer_id: int,
+        date_from: date,
+        date_to: date,
+    ) -> tuple[dict[str, list[int]] | None, str]:
+        """
+        Возвращает свободные часы тренера в окне [date_from, date_to) и
+        текущее поколение кэша. Если хотя бы один месяц окна не
+        загружен, вместо данных возвращается None, а поколение
+        передаётся в set после загрузки из базы.
+        """
+
+        months: list[str] = _months(date_from, date_to)
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hmget(self._key(trainer_id), months)
+                pipe.get(self._gen_key(trainer_id))
+                values, gen = await pipe.execute()
+        except RedisError as error:
+            self.errors += 1
+            logger.warning(
+                'Кэш доступности недоступен, trainer_id=%s: %s',
+                trainer_id, error,
+            )
+            return None, ''
+
+        gen = gen.decode() if gen else '0'
+
+        if None in values:
+            self._count(hit=False)
+            return None, gen
+
+        self._count(hit=True)
+        iso_from: str = date_from.isoformat()
+        iso_to: str = date_to.isoformat()
+
+        return {
+            date_: hours
+            for value in values
+            for date_, hours in json.loads(value).items()
+            if iso_from <= date_ < iso_to
+        }, gen
+
+    async def set(
+        self,
+        trainer_id: int,
+        date_from: date,
+        date_to: date,
+        free_slots: dict[str, list[int]],
+        gen: str,
+    ) -> None:
+        """
+        Сохраняет свободные часы тренера в окне [date_from, date_to),
+        разбитые по месяцам, если с момента get кэш тренера не
+        сбрасывался. Данные месяца начинаются с date_from, что достаточно:
+        более ранние даты уже прошли.
+        """
+
+        if not gen:
+            return
+
+        months: dict[str, dict[str, list[int]]] = {
+            month: {} for month in _months(date_from, date_to)
+        }
+        for date_, hours in free_slots.items():
+            months[date_[:7]][date_] = hours
+
+        mapping: list[str] = []
+        for month, days in months.items():
+            mapping.extend((month, json.dumps(days)))
+
+        try:
+            await self._set_if_gen(
+                keys=[self._key(trainer_id), self._gen_key(trainer_id)],
+                args=[gen, self.ttl, *mapping],
+            )
+        except RedisError as error:
+            self.errors += 1
+            logger.warning(
+                'Не удалось сохранить доступность trainer_id=%s в кэш: %s',
+                trainer_id, error,
+            )
+
+    async def invalidate(self, trainer_id: int) -> None:
+        """
+        Сбрасывает кэш тренера и увеличивает его поколение.
+        """
+
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.delete(self._key(trainer_id))
+                pipe.incr(self._gen_key(trainer_id))
+                pipe.expire(self._gen_key(trainer_id), GEN_TTL)
+                await pipe.execute()
+        except RedisError as error:
+            self.errors += 1
+            logger.error(
+                'Не удалось сбросить кэш доступности trainer_id=%s, '
+                'данные устареют не более чем на %s с',
+                trainer_id, self.ttl,
+                exc_info=error,
+            )
+
+    def _count(self, hit: bool) -> None:
+
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+        total: int = self.hits + self.misses
+        if total % STATS_EVERY == 0:
+            logger.info(
+                'Кэш доступности: попаданий %s, промахов %s (%.1f%%), '
+                'ошибок %s',
+                self.hits, self.misses, 100 * self.hits / total,
+                self.errors,
+            )
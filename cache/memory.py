@@ -0,0 +1,129 @@
+import asyncio
+import logging
+
+from cachetools import TTLCache
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+
+logger = logging.getLogger(__name__)
+
+STATS_EVERY = 1000  # период вывода статистики, количество обращений
+
+T = TypeVar('T')
+
+_MISSING = object()
+
+
+@dataclass
+class _Flight:
+    """
+    Загрузка ключа: блокировка, число ожидающих её корутин и эпоха
+    ключа, которая увеличивается при каждом сбросе записи.
+    """
+
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    waiters: int = 0
+    epoch: int = 0
+
+
+class AsyncTTLCache:
+    """
+    Ограниченный по размеру кэш в памяти процесса со сроком жизни
+    записей для асинхронных загрузчиков.
+
+    Одновременные промахи по одному ключу ждут единственной загрузки.
+    Сброс ключа во время его загрузки не даёт сохранить её результат,
+    поэтому данные, прочитанные до изменения в базе, не попадут в кэш;
+    загрузки других ключей при этом сохраняются.
+    Закэшированные значения общие для всех запросов и не должны
+    изменяться вызывающим кодом.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+
+        self.name = name
+        self._data: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._flights: dict[Hashable, _Flight] = {}
+        self._generation: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[T]],
+    ) -> T:
+        """
+        Возвращает значение по ключу, при промахе вызывает loader и
+        сохраняет результат, в том числе None.
+        """
+
+        value: Any = self._data.get(key, _MISSING)
+        if value is not _MISSING:
+            self._count(hit=True)
+            return value
+
+        # Запись удаляется, когда её не ждёт ни одна корутина: иначе
+        # разбуженная корутина взяла бы старую блокировку, а новая —
+        # свежую, и ключ загрузился бы дважды.
+        flight: _Flight = self._flights.setdefault(key, _Flight())
+        flight.waiters += 1
+        try:
+            async with flight.lock:
+                value = self._data.get(key, _MISSING)
+                if value is not _MISSING:
+                    self._count(hit=True)
+                    return value
+
+                self._count(hit=False)
+                epoch: tuple[int, int] = (self._generation, flight.epoch)
+                value = await loader()
+                if epoch == (self._generation, flight.epoch):
+                    self._data[key] = value
+
+                return value
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters:
+                del self._flights[key]
+
+    def invalidate(self, *keys: Hashable) -> None:
+        """
+        Удаляет записи по ключам. Идущие загрузки этих ключей не
+        сохранят свой результат.
+        """
+
+        for key in keys:
+            self._data.pop(key, None)
+            flight: _Flight | None = self._flights.get(key)
+            if flight is not None:
+                flight.epoch += 1
+
+    def clear(self) -> None:
+
+        self._generation += 1
+        self._data.clear()
+
+    def stats(self) -> dict[str, Any]:
+
+        total: int = self.hits + self.misses
+
+        return {
+            'name': self.name,
+            'size': self._data.currsize,
+            'maxsize': self._data.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+        }
+
+    def _count(self, hit: bool) -> None:
+
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+        if (self.hits + self.misses) % STATS_EVERY == 0:
+            logger.info('Кэш %s: %s', self.name, self.stats())
@@ -1,10 +1,27 @@
 from .bot import bot
-from .engine import engine, create_tables, Session
+from .engine import (
+    config,
+    create_async_sessionmaker,
+    create_engine,
+    create_tables,
+    engine,
+    replica_engine,
+    ReplicaSession,
+    Session,
+)
+from .pool import get_pool_metrics, log_pool_metrics
 
 
 __all__ = [
     bot,
-    engine,
+    config,
+    create_async_sessionmaker,
+    create_engine,
     create_tables,
+    engine,
+    get_pool_metrics,
+    log_pool_metrics,
+    replica_engine,
+    ReplicaSession,
     Session,
 ]
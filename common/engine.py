@@ -3,23 +3,56 @@ from sqlalchemy.ext.asyncio import (
     async_sessionmaker,
     AsyncEngine,
 )
+from sqlalchemy.pool import NullPool
 
-from db import Base
-from config import load_config, Config
+from db import run_migrations
+from config import load_config, Config, PoolConfig
+from .pool import InstrumentedPool
 
 
 config: Config = load_config()
 
 
-def create_engine(config: Config) -> AsyncEngine:
+def create_engine(
+    config: Config,
+    pool: PoolConfig | None = None,
+    application_name: str = 'bot',
+    host: str | None = None,
+) -> AsyncEngine:
+    """
+    Создаёт движок asyncpg с параметрами пула из профиля pool
+    (по умолчанию профиль процесса бота). Параметр host позволяет
+    подключиться к реплике вместо основного сервера.
+    """
+
+    pool = pool or config.bot_pool
+    host = host or config.data_base.HOST
 
     engine: AsyncEngine = create_async_engine(
         url=(
             f'postgresql+asyncpg://'
             f'{config.data_base.USER}:{config.data_base.PASSWORD}@'
-            f'{config.data_base.HOST}/{config.data_base.NAME}'
+            f'{host}/{config.data_base.NAME}'
         ),
         echo=False,
+        poolclass=InstrumentedPool,
+        pool_size=pool.POOL_SIZE,
+        max_overflow=pool.MAX_OVERFLOW,
+        pool_timeout=pool.POOL_TIMEOUT,
+        pool_recycle=pool.POOL_RECYCLE,
+        pool_pre_ping=pool.PRE_PING,
+        connect_args={
+            'statement_cache_size': pool.STATEMENT_CACHE_SIZE,
+            'prepared_statement_cache_size': pool.STATEMENT_CACHE_SIZE,
+            'command_timeout': pool.COMMAND_TIMEOUT,
+            'server_settings': {
+                'application_name': application_name,
+                'statement_timeout': str(pool.STATEMENT_TIMEOUT),
+                'idle_in_transaction_session_timeout': str(
+                    pool.IDLE_IN_TRANSACTION_TIMEOUT
+                ),
+            },
+        },
     )
 
     return engine
@@ -31,11 +64,39 @@ def create_async_sessionmaker(engine: AsyncEngine) -> async_sessionmaker:
 
 
 async def create_tables(engine: AsyncEngine):
+    """
+    Создаёт схему базы данных или обновляет существующую
+    до последней версии миграций.
 
-    async with engine.begin() as conn:
-        #  await conn.run_sync(Base.metadata.drop_all)  # для теста
-        await conn.run_sync(Base.metadata.create_all, checkfirst=True)
+    Миграции переписывают таблицы целиком, поэтому выполняются через
+    отдельное соединение к тому же серверу без таймаутов пула бота.
+    """
+
+    migration_engine: AsyncEngine = create_async_engine(
+        url=engine.url,
+        echo=False,
+        poolclass=NullPool,
+        connect_args={
+            'command_timeout': None,
+            'server_settings': {'application_name': 'migrations'},
+        },
+    )
+    try:
+        await run_migrations(migration_engine)
+    finally:
+        await migration_engine.dispose()
 
 
 engine: AsyncEngine = create_engine(config)
 Session = create_async_sessionmaker(engine)
+
+# Реплика для чтения необязательна: без POSTGRES_REPLICA_HOST все
+# запросы выполняются на основном сервере.
+replica_engine: AsyncEngine | None = create_engine(
+    config,
+    application_name='bot-replica',
+    host=config.data_base.REPLICA_HOST,
+) if config.data_base.REPLICA_HOST else None
+ReplicaSession: async_sessionmaker | None = create_async_sessionmaker(
+    replica_engine
+) if replica_engine else None
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+
+from bisect import bisect_left
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from time import perf_counter
+
+
+logger = logging.getLogger(__name__)
+
+# Верхние границы корзин гистограммы ожидания соединения, мс.
+WAIT_BUCKETS: tuple[float, ...] = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class WaitHistogram:
+    """
+    Гистограмма времени ожидания соединения из пула.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = WAIT_BUCKETS):
+
+        self.buckets = buckets
+        self.counts: list[int] = [0] * (len(buckets) + 1)
+        self.total: int = 0
+        self.total_ms: float = 0.0
+        self.max_ms: float = 0.0
+
+    def observe(self, wait_ms: float) -> None:
+
+        self.counts[bisect_left(self.buckets, wait_ms)] += 1
+        self.total += 1
+        self.total_ms += wait_ms
+        self.max_ms = max(self.max_ms, wait_ms)
+
+    def snapshot(self) -> dict[str, int]:
+        """
+        Возвращает количество наблюдений по корзинам: '<=5', ... '>1000'.
+        """
+
+        labels = [f'<={bucket:g}' for bucket in self.buckets]
+        labels.append(f'>{self.buckets[-1]:g}')
+
+        return dict(zip(labels, self.counts))
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, измеряющий время выдачи соединения.
+
+    Учитывается ожидание свободного соединения и открытие нового,
+    если пул ещё не заполнен.
+    """
+
+    def __init__(self, *args, **kwargs):
+
+        super().__init__(*args, **kwargs)
+        self.wait_histogram = WaitHistogram()
+        self.errors: int = 0
+
+    def _do_get(self):
+
+        started: float = perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.wait_histogram.observe((perf_counter() - started) * 1000)
+
+    def recreate(self) -> 'InstrumentedPool':
+
+        pool: InstrumentedPool = super().recreate()
+        pool.wait_histogram = self.wait_histogram
+        pool.errors = self.errors
+
+        return pool
+
+
+def get_pool_metrics(engine: AsyncEngine) -> dict:
+    """
+    Текущие показатели пула движка: занятые и свободные соединения,
+    переполнение и статистика ожидания.
+    """
+
+    pool = engine.pool
+    metrics = {
+        'size': pool.size(),
+        'checked_out': pool.checkedout(),
+        'checked_in': pool.checkedin(),
+        'overflow': pool.overflow(),
+    }
+
+    if isinstance(pool, InstrumentedPool):
+        histogram: WaitHistogram = pool.wait_histogram
+        metrics.update(
+            waits=histogram.total,
+            wait_avg_ms=round(
+                histogram.total_ms / histogram.total, 2
+            ) if histogram.total else 0.0,
+            wait_max_ms=round(histogram.max_ms, 2),
+            wait_histogram=histogram.snapshot(),
+            errors=pool.errors,
+        )
+
+    return metrics
+
+
+async def log_pool_metrics(
+    engine: AsyncEngine,
+    name: str,
+    interval: int,
+) -> None:
+    """
+    Периодически пишет показатели пула в лог. Запускается фоновой задачей.
+    """
+
+    while True:
+        await asyncio.sleep(interval)
+        logger.info('Пул %s: %s', name, get_pool_metrics(engine))
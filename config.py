@@ -14,6 +14,30 @@ class DbConfig:
     PASSWORD: str
     HOST: str
     NAME: str
+    REPLICA_HOST: str | None = None
+
+
+@dataclass
+class PoolConfig:
+    """
+    Параметры пула соединений и сессий Postgres для одного процесса.
+    """
+
+    POOL_SIZE: int
+    MAX_OVERFLOW: int
+    POOL_TIMEOUT: float
+    POOL_RECYCLE: int
+    PRE_PING: bool
+    STATEMENT_CACHE_SIZE: int
+    COMMAND_TIMEOUT: float
+    STATEMENT_TIMEOUT: int
+    IDLE_IN_TRANSACTION_TIMEOUT: int
+    METRICS_INTERVAL: int
+
+
+@dataclass
+class RedisConfig:
+    url: str
 
 
 @dataclass
@@ -32,10 +56,36 @@ class NatsConsumerConfig:
 class Config:
     tg_bot: TgBot
     data_base: DbConfig
+    bot_pool: PoolConfig
+    worker_pool: PoolConfig
+    redis: RedisConfig
     nats: NatsConfig
     nats_consumer: NatsConsumerConfig
 
 
+def load_pool_config(env: Env, prefix: str, pool_size: int) -> PoolConfig:
+    """
+    Загружает параметры пула из переменных окружения с префиксом
+    prefix (BOT_DB_, WORKER_DB_). Таймауты сервера задаются в мс.
+    """
+
+    with env.prefixed(prefix):
+        return PoolConfig(
+            POOL_SIZE=env.int('POOL_SIZE', pool_size),
+            MAX_OVERFLOW=env.int('MAX_OVERFLOW', pool_size // 2),
+            POOL_TIMEOUT=env.float('POOL_TIMEOUT', 10.0),
+            POOL_RECYCLE=env.int('POOL_RECYCLE', 1800),
+            PRE_PING=env.bool('PRE_PING', True),
+            STATEMENT_CACHE_SIZE=env.int('STATEMENT_CACHE_SIZE', 100),
+            COMMAND_TIMEOUT=env.float('COMMAND_TIMEOUT', 30.0),
+            STATEMENT_TIMEOUT=env.int('STATEMENT_TIMEOUT', 15000),
+            IDLE_IN_TRANSACTION_TIMEOUT=env.int(
+                'IDLE_IN_TRANSACTION_TIMEOUT', 60000,
+            ),
+            METRICS_INTERVAL=env.int('METRICS_INTERVAL', 60),
+        )
+
+
 def load_config(path: str | None = None) -> Config:
     env = Env()
     env.read_env(path)
@@ -49,7 +99,11 @@ def load_config(path: str | None = None) -> Config:
             env('POSTGRES_PASSWORD'),
             env('POSTGRES_HOST'),
             env('POSTGRES_DB'),
+            env('POSTGRES_REPLICA_HOST', None),
         ),
+        bot_pool=load_pool_config(env, 'BOT_DB_', pool_size=10),
+        worker_pool=load_pool_config(env, 'WORKER_DB_', pool_size=4),
+        redis=RedisConfig(url=env('REDIS_URL', 'redis://redis:6379/0')),
         nats=NatsConfig(servers=env.list('NATS_SERVERS')),
         nats_consumer=NatsConsumerConfig(
             subject_name=env('NATS_SUBJECT_NAME'),
@@ -1,8 +1,11 @@
 from .models import (
+    Availability,
     Base,
     Client,
+    Outbox,
     RelationUsers,
     set_client,
+    set_outbox,
     set_relation_users,
     set_schedule,
     set_trainer,
@@ -15,19 +18,25 @@ from .models import (
     WorkingDay,
     Workout,
 )
+from .migrations import run_migrations
 from .db_operations import (
     add_client,
     add_trainer,
     add_trainer_schedule,
     add_training,
     add_workout,
+    BookingResult,
+    BookingStatus,
     cancel_training_db,
+    gather_reads,
     get_client_db,
     get_clients_training,
     get_client_trainings,
+    get_free_slots,
     get_frame_clients,
     get_schedules,
     get_schedule_exsists,
+    get_trainer_profile,
     get_trainer_schedule,
     get_trainer_schedules,
     get_trainers,
@@ -35,8 +44,10 @@ from .db_operations import (
     get_work_days,
     get_workouts,
     relation_exists_trainer_client,
+    resolve_roles,
     update_working_day,
     update_workouts,
+    UserRoles,
 )
 
 
@@ -46,24 +57,34 @@ __all__ = [
     add_trainer_schedule,
     add_training,
     add_workout,
+    Availability,
     Base,
+    BookingResult,
+    BookingStatus,
     cancel_training_db,
     Client,
+    gather_reads,
     get_client_db,
     get_client_trainings,
     get_clients_training,
+    get_free_slots,
     get_frame_clients,
     get_schedules,
     get_schedule_exsists,
+    get_trainer_profile,
     get_trainer_schedule,
     get_trainers,
     get_trainer_schedules,
     get_workouts,
     get_work_days,
     get_user,
+    Outbox,
     RelationUsers,
     relation_exists_trainer_client,
+    resolve_roles,
+    run_migrations,
     set_client,
+    set_outbox,
     set_relation_users,
     set_schedule,
     set_trainer,
@@ -77,4 +98,5 @@ __all__ = [
     WorkingDay,
     update_workouts,
     update_working_day,
+    UserRoles,
 ]
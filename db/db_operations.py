@@ -1,24 +1,53 @@
+import asyncio
+
 from aiogram_dialog import DialogManager
-from datetime import datetime
-from sqlalchemy import exists, select
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from cache import AsyncTTLCache
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import date, datetime
+from enum import Enum
+from sqlalchemy import (
+    and_,
+    BigInteger,
+    cast,
+    Date,
+    delete,
+    exists,
+    func,
+    Integer,
+    literal,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import (
+    aggregate_order_by,
+    BIT,
+    insert,
+    JSON,
+)
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import aliased, selectinload
+from typing import Any, Awaitable, Iterable
 
 from db import (
+    Availability,
     Client,
+    Outbox,
     RelationUsers,
     set_relation_users,
     Schedule,
     set_schedule,
-    set_trainer_schedule,
     set_work_day,
+    set_workout,
     Trainer,
     TrainerSchedule,
     Workout,
     WorkingDay,
 )
 from schemas import ScheduleSchema
-from timezones import get_current_datetime
+from slots import HOURS, SlotMask
+from timezones import get_today
 
 
 CLIENT_ID = 'client_id'
@@ -27,10 +56,13 @@ ID = 'id'
 IS_WORK = 'is_work'
 LIMIT = 'limit'
 NAME = 'name'
-OFFSET = 'offset'
 RADIO_WORK = 'radio_work'
+SCHEDULE = 'schedule'
 SCHEDULES = 'schedules'
+READ_SESSION = 'read_session'
+READ_SESSION_POOL = 'read_session_pool'
 SESSION = 'session'
+SESSION_POOL = 'session_pool'
 TIME = 'time'
 TIME_ZONE = 'time_zone'
 TRAINER_ID = 'trainer_id'
@@ -40,6 +72,125 @@ WORKOUT = 'workout'
 WORKOUTS = 'workouts'
 
 
+PROFILE_CACHE_SIZE = 10000  # максимальное количество записей в кэше
+PROFILE_CACHE_TTL = 600  # время жизни записей, секунды
+ROLES_CACHE_SIZE = 10000
+ROLES_CACHE_TTL = 30  # короткий срок: покрывает всплески /start
+
+# Кэши редко меняющихся данных, сбрасываются при их изменении.
+trainer_profiles = AsyncTTLCache(
+    name='trainer_profiles',
+    maxsize=PROFILE_CACHE_SIZE,
+    ttl=PROFILE_CACHE_TTL,
+)
+trainer_work_days = AsyncTTLCache(
+    name='trainer_work_days',
+    maxsize=PROFILE_CACHE_SIZE,
+    ttl=PROFILE_CACHE_TTL,
+)
+user_roles = AsyncTTLCache(
+    name='user_roles',
+    maxsize=ROLES_CACHE_SIZE,
+    ttl=ROLES_CACHE_TTL,
+)
+
+
+_read_session: ContextVar[AsyncSession | None] = ContextVar(
+    'read_session',
+    default=None,
+)
+
+
+def _get_session(dialog_manager: DialogManager) -> AsyncSession:
+    """
+    Возвращает сессию текущего запроса: отдельную сессию чтения внутри
+    gather_reads или общую сессию из middleware.
+    """
+
+    session: AsyncSession | None = _read_session.get()
+    if session is None:
+        session = dialog_manager.middleware_data.get(SESSION)
+
+    return session
+
+
+def _get_read_session(dialog_manager: DialogManager) -> AsyncSession:
+    """
+    Возвращает сессию для запросов только на чтение.
+
+    Если middleware передал сессию реплики, чтение идёт через неё.
+    После фиксации транзакции в текущем апдейте чтение возвращается на
+    основной сервер, чтобы пользователь видел собственные изменения.
+    """
+
+    session: AsyncSession | None = _read_session.get()
+    if session is not None:
+        return session
+
+    session = dialog_manager.middleware_data.get(SESSION)
+    if getattr(session, 'committed', False):
+        return session
+
+    return dialog_manager.middleware_data.get(READ_SESSION, session)
+
+
+def _slot_count(mask):
+    """
+    SQL-выражение количества установленных битов маски часов.
+    """
+
+    return func.bit_count(cast(mask, BIT(HOURS)))
+
+
+async def _run_read(
+    session_pool: async_sessionmaker,
+    read: Awaitable[Any],
+) -> Any:
+
+    async with session_pool() as session:
+        token = _read_session.set(session)
+        try:
+            return await read
+        finally:
+            _read_session.reset(token)
+
+
+async def gather_reads(
+    dialog_manager: DialogManager,
+    *reads: Awaitable[Any],
+) -> list[Any]:
+    """
+    Параллельно выполняет независимые запросы чтения из db_operations.
+
+    Каждый запрос получает собственную сессию и соединение из пула
+    (пула реплики, если чтение с неё разрешено), поэтому общее время
+    равно самому долгому запросу, а не их сумме.
+    Полученные объекты отсоединены от сессии: их загруженные атрибуты
+    доступны, ленивые связи — нет. Без пула сессий в middleware_data
+    запросы выполняются последовательно в общей сессии.
+    """
+
+    middleware_data: dict = dialog_manager.middleware_data
+    session: AsyncSession | None = middleware_data.get(SESSION)
+
+    session_pool: async_sessionmaker | None = (
+        middleware_data.get(SESSION_POOL)
+        if getattr(session, 'committed', False)
+        else middleware_data.get(
+            READ_SESSION_POOL, middleware_data.get(SESSION_POOL)
+        )
+    )
+
+    if session_pool is None:
+        return [await read for read in reads]
+
+    return list(
+        await asyncio.gather(
+            *(_run_read(session_pool, read) for read in reads)
+        )
+    )
+
+
 async def relation_exists_trainer_client(
     dialog_manager: DialogManager,
     client_id: int,
@@ -49,7 +200,7 @@ async def relation_exists_trainer_client(
     Проверяет существование связи между Trainer и Client.
     """
 
-    session: AsyncSession = dialog_manager.middleware_data.get(SESSION)
+    session: AsyncSession = _get_session(dialog_manager)
 
     stmt = (
         select(
@@ -76,7 +227,7 @@ async def get_schedule_exsists(
     Функция используется для проверки существования записи.
     """
 
-    session: AsyncSession = dialog_manager.middleware_data.get(SESSION)
+    session: AsyncSession = _get_session(dialog_manager)
 
     dt = datetime.fromisoformat(selected_date)
 
@@ -102,13 +253,32 @@ async def get_user(
     model: Client | Trainer
 ) -> Trainer | Client | None:
 
-    session: AsyncSession = dialog_manager.middleware_data.get(SESSION)
+    session: AsyncSession = _get_session(dialog_manager)
 
     user = await session.get(model, user_id)
 
     return user
 
 
+async def get_trainer_profile(
+    dialog_manager: DialogManager,
+    trainer_id: int,
+) -> dict[str, Any] | None:
+    """
+    Возвращает данные тренера (id, name, time_zone) из кэша, при промахе
+    загружает их из базы данных. None, если тренер не найден.
+    """
+
+    async def load() -> dict[str, Any] | None:
+
+        session: AsyncSession = _get_read_session(dialog_manager)
+        trainer: Trainer | None = await session.get(Trainer, trainer_id)
+
+        return trainer.get_data() if trainer is not None else None
+
+    return await trainer_profiles.get_or_load(trainer_id, load)
+
+
 async def get_client_db(
     dialog_manager: DialogManager,
     client_id: int,
@@ -118,7 +288,7 @@ async def get_client_db(
     Асинхронно извлекает данные клиента.
     """
 
-    session: AsyncSession = dialog_manager.middleware_data.get(SESSION)
+    session: AsyncSession = _get_session(dialog_manager)
 
     stmt = (
         select(Client)
@@ -145,7 +315,7 @@ async def add_workout(
     тренером.
     """
 
-    session: AsyncSession = dialog_manager.middleware_data.get(SESSION)
+    session: AsyncSession = _get_session(dialog_manager)
 
     relation_users: RelationUsers = set_relation_users(
         trainer_id=workout.trainer_id,
@@ -155,6 +325,7 @@ async def add_workout(
     session.add_all([workout, relation_users])
 
     await session.commit()
+    user_roles.invalidate(workout.client_id)
 
     return workout
 
@@ -168,25 +339,28 @@ async def add_trainer(
     дней по умолчанию.
     """
 
-    session: AsyncSession = dialog_manager.middleware_data.get(SESSION)
+    session: AsyncSession = _get_session(dialog_manager)
 
     for item in range(1, 4):
         working_day: WorkingDay = set_work_day(
             item=str(item),
-            work=','.join(map(str, range(9, 18+item))),
+            slots=SlotMask.from_hours(range(9, 18+item)),
             trainer_id=trainer.id,
         )
         trainer.working_days.append(working_day)
 
     session.add(trainer)
     await session.commit()
+    trainer_profiles.invalidate(trainer.id)
+    user_roles.invalidate(trainer.id)
+    trainer_work_days.invalidate(trainer.id)
 
     return trainer
 
 
 async def add_client(
     dialog_manager: DialogManager,
-    trainer: Trainer,
+    trainer_id: int,
     client: Client,
     workout: Workout
 ) -> Client:
@@ -195,12 +369,17 @@ async def add_client(
     инициализирует счётчик тренировок.
     """
 
-    session: AsyncSession = dialog_manager.middleware_data.get(SESSION)
+    session: AsyncSession = _get_session(dialog_manager)
+
+    relation_users: RelationUsers = set_relation_users(
+        trainer_id=trainer_id,
+        client_id=client.id,
+    )
 
     client.workouts.append(workout)
-    client.trainers.append(trainer)
-    session.add(client)
+    session.add_all([client, relation_users])
     await session.commit()
+    user_roles.invalidate(client.id)
 
     return client
 
@@ -214,7 +393,7 @@ async def update_workouts(
     Обновляет количество тренировок клиента в базе данных.
     """
 
-    session: AsyncSession = dialog_manager.middleware_data.get(SESSION)
+    session: AsyncSession = _get_session(dialog_manager)
 
     workout.workouts = workouts
     await session.commit()
@@ -224,42 +403,58 @@ async def update_workouts(
 
 async def get_frame_clients(
     dialog_manager: DialogManager,
-    all=True
-) -> list[dict]:
+    all=True,
+    cursor: int | None = None,
+    backward: bool = False
+) -> tuple[list[dict], bool]:
     """
-    Асинхронно извлекает постраничный список клиентов, связанных с
-    текущим тренером.
+    Асинхронно извлекает страницу клиентов, связанных с текущим тренером,
+    используя keyset-пагинацию по Client.id.
+
+    cursor - id клиента, после которого (или перед которым, если
+    backward=True) начинается страница. Запрос выбирает на одну запись
+    больше лимита, поэтому признак наличия следующей страницы в
+    направлении обхода возвращается тем же запросом.
     """
 
-    offset: int = dialog_manager.dialog_data.get(OFFSET, 0)
     limit: int = dialog_manager.dialog_data.get(LIMIT, 5)
     trainer_id: int = dialog_manager.event.from_user.id
 
-    session: AsyncSession = dialog_manager.middleware_data.get(SESSION)
+    session: AsyncSession = _get_read_session(dialog_manager)
 
-    if all:
-        stmt = (
-            select(Client, Workout)
-            .join(Client.trainers)
-            .join(Workout)
-            .where(Trainer.id == trainer_id)
-            .order_by(Client.id)
-            .offset(offset)
-            .limit(limit)
+    stmt = (
+        select(Client, Workout)
+        .join(RelationUsers, RelationUsers.client_id == Client.id)
+        .join(
+            Workout,
+            and_(
+                Workout.client_id == Client.id,
+                Workout.trainer_id == RelationUsers.trainer_id,
+            )
         )
+        .where(RelationUsers.trainer_id == trainer_id)
+        .limit(limit + 1)
+    )
+
+    if not all:
+        stmt = stmt.where(Workout.workouts > 0)
 
+    if backward:
+        if cursor is not None:
+            stmt = stmt.where(Client.id < cursor)
+        stmt = stmt.order_by(Client.id.desc())
     else:
-        stmt = (
-            select(Client, Workout)
-            .join(Client.trainers)
-            .join(Workout)
-            .where(Trainer.id == trainer_id, Workout.workouts > 0)
-            .order_by(Client.id)
-            .offset(offset)
-            .limit(limit)
-        )
+        if cursor is not None:
+            stmt = stmt.where(Client.id > cursor)
+        stmt = stmt.order_by(Client.id)
 
     result = await session.execute(stmt)
+    rows = result.all()
+
+    has_more: bool = len(rows) > limit
+    rows = rows[:limit]
+    if backward:
+        rows.reverse()
 
     group: list[dict] = [
         {
@@ -267,10 +462,10 @@ async def get_frame_clients(
             'name': client.name,
             'workouts': workout.workouts
         }
-        for client, workout in result
+        for client, workout in rows
     ]
 
-    return group
+    return group, has_more
 
 
 async def get_workouts(
@@ -283,7 +478,7 @@ async def get_workouts(
     клиента и тренера.
     """
 
-    session: AsyncSession = dialog_manager.middleware_data.get(SESSION)
+    session: AsyncSession = _get_session(dialog_manager)
 
     stmt = (
         select(Workout)
@@ -300,39 +495,46 @@ async def get_workouts(
 
 async def get_work_days(
     dialog_manager: DialogManager
-) -> list[WorkingDay] | None:
+) -> tuple[dict[str, Any], ...] | None:
     """
-    Асинхронно извлекает список рабочих смен (WorkingDay) тренера по его ID.
+    Асинхронно извлекает данные рабочих смен (WorkingDay.get_data) тренера
+    по его ID. Результат кэшируется до изменения смен.
     """
 
     trainer_id = dialog_manager.event.from_user.id
 
-    session: AsyncSession = dialog_manager.middleware_data.get(SESSION)
+    async def load() -> tuple[dict[str, Any], ...] | None:
 
-    stmt = (
-        select(Trainer)
-        .where(Trainer.id == trainer_id)
-        .options(selectinload(Trainer.working_days))
-    )
-    trainer: Trainer = await session.scalar(stmt)
-    if trainer is not None:
-        working_days: list[WorkingDay] = trainer.working_days
-        if working_days:
-            return working_days
-    return None
+        session: AsyncSession = _get_session(dialog_manager)
+
+        stmt = (
+            select(Trainer)
+            .where(Trainer.id == trainer_id)
+            .options(selectinload(Trainer.working_days))
+        )
+        trainer: Trainer = await session.scalar(stmt)
+        if trainer is not None:
+            working_days: list[WorkingDay] = trainer.working_days
+            if working_days:
+                return tuple(
+                    working_day.get_data() for working_day in working_days
+                )
+        return None
+
+    return await trainer_work_days.get_or_load(trainer_id, load)
 
 
 async def update_working_day(
     dialog_manager: DialogManager,
     item: str,
-    value: str
+    value: SlotMask
 ) -> WorkingDay | None:
     """
-    Обновляет расписание (work) для конкретной рабочей смены (WorkingDay)
+    Обновляет часы (slots) для конкретной рабочей смены (WorkingDay)
     тренера.
     """
 
-    session: AsyncSession = dialog_manager.middleware_data.get(SESSION)
+    session: AsyncSession = _get_session(dialog_manager)
 
     trainer_id: int = dialog_manager.event.from_user.id
 
@@ -347,9 +549,10 @@ async def update_working_day(
     work_day = result.scalar()
 
     if work_day is not None:
-        work_day.work = value
+        work_day.slots = value
 
         await session.commit()
+        trainer_work_days.invalidate(trainer_id)
 
     return work_day
 
@@ -358,40 +561,144 @@ async def add_trainer_schedule(
     dialog_manager: DialogManager,
     trainer_schedules: dict,
     work_schedules: dict
-) -> None:
+) -> list[str]:
     """
     Добавляет расписания тренера в базу данных на
     основе предоставленного словаря.
+
+    Все даты вставляются одним многострочным INSERT ... ON CONFLICT
+    DO NOTHING по уникальности (trainer_id, date), для вставленных дат
+    тем же выражением создаются строки Availability. Возвращает список
+    дат в ISO-формате, расписание на которые уже существовало.
     """
 
-    session: AsyncSession = dialog_manager.middleware_data.get(SESSION)
+    session: AsyncSession = _get_session(dialog_manager)
 
     trainer_id: int = dialog_manager.event.from_user.id
 
-    for date_selected, work_item in trainer_schedules.items():
-        dt = datetime.fromisoformat(date_selected)
-        trainer_schedule: TrainerSchedule = set_trainer_schedule(
-            date=dt.date(),
-            time=work_schedules[work_item],
-            trainer_id=trainer_id,
+    values: list[dict] = [
+        {
+            'date': datetime.fromisoformat(date_selected).date(),
+            'slots': int(SlotMask.parse(work_schedules[work_item])),
+            'trainer_id': trainer_id,
+        }
+        for date_selected, work_item in trainer_schedules.items()
+    ]
+    if not values:
+        return []
+
+    trainer_schedule_inserted = (
+        insert(TrainerSchedule.__table__)
+        .values(values)
+        .on_conflict_do_nothing(
+            index_elements=[TrainerSchedule.trainer_id, TrainerSchedule.date]
+        )
+        .returning(
+            TrainerSchedule.trainer_id,
+            TrainerSchedule.date,
+            TrainerSchedule.slots,
         )
-        session.add(trainer_schedule)
+        .cte('trainer_schedule_inserted')
+    )
+    availability_inserted = insert(Availability.__table__).from_select(
+        [
+            Availability.trainer_id,
+            Availability.date,
+            Availability.free_mask,
+            Availability.free_count,
+        ],
+        select(
+            trainer_schedule_inserted.c.trainer_id,
+            trainer_schedule_inserted.c.date,
+            trainer_schedule_inserted.c.slots,
+            _slot_count(trainer_schedule_inserted.c.slots),
+        ),
+    )
+    availability_inserted = (
+        availability_inserted
+        .on_conflict_do_update(
+            index_elements=[Availability.trainer_id, Availability.date],
+            set_={
+                Availability.free_mask:
+                    availability_inserted.excluded.free_mask,
+                Availability.free_count:
+                    availability_inserted.excluded.free_count,
+            },
+        )
+        .cte('availability_inserted')
+    )
+    stmt = (
+        select(trainer_schedule_inserted.c.date)
+        .add_cte(availability_inserted)
+    )
+
+    result = await session.execute(stmt)
+    inserted: set[str] = {date_.isoformat() for date_ in result.scalars()}
 
     await session.commit()
 
+    return [
+        date_selected for date_selected in trainer_schedules
+        if date_selected not in inserted
+    ]
+
+
+class BookingStatus(str, Enum):
+    """
+    Итог попытки записи клиента на тренировку.
+    """
+
+    BOOKED = 'booked'
+    SLOT_TAKEN = 'slot_taken'
+    NO_BALANCE = 'no_balance'
+    NOT_IN_HOURS = 'not_in_hours'
+
+
+@dataclass(frozen=True)
+class BookingResult:
+    """
+    Результат add_training: статус записи, остаток тренировок клиента
+    и идентификатор созданной записи Schedule (если запись создана).
+    """
+
+    status: BookingStatus
+    workouts: int | None = None
+    schedule_id: int | None = None
+
+
+@dataclass(frozen=True)
+class UserRoles:
+    """
+    Роли пользователя: данные клиента (Client.get_data), данные тренера
+    (Trainer.get_data) и тренеры клиента. Отсутствующая роль — None.
+    """
+
+    client: dict[str, Any] | None
+    trainer: dict[str, Any] | None
+    trainers: tuple[dict[str, Any], ...] = ()
+
 
 async def add_training(
     dialog_manager: DialogManager,
     selected_date: str,
     selected_time: int,
     client_id: int,
-    trainer_id: int
-) -> Schedule | None:
+    trainer_id: int,
+    outbox: Iterable[Outbox] = ()
+) -> BookingResult:
     """
-    Создает запись о тренировке
+    Создает запись о тренировке.
+
+    Проверка рабочих часов тренера и остатка тренировок, вставка Schedule
+    и списание тренировки выполняются одним выражением с CTE. Вставка
+    защищена уникальным индексом (trainer_id, date, time), списание
+    выполняется только при workouts > 0, поэтому параллельные запросы
+    не могут записать двух клиентов на одно время или увести остаток
+    в минус. Занятый час снимается с маски Availability тем же
+    выражением. События outbox сохраняются только вместе с записью.
     """
 
-    session: AsyncSession = dialog_manager.middleware_data.get(SESSION)
+    session: AsyncSession = _get_session(dialog_manager)
 
     dt = datetime.fromisoformat(selected_date)
 
@@ -402,122 +709,293 @@ async def add_training(
         time=selected_time,
     )
 
-    schedule: Schedule = set_schedule(
-        client_id=schedule_schema.client_id,
-        trainer_id=schedule_schema.trainer_id,
-        date=schedule_schema.date,
-        time=schedule_schema.time,
+    in_hours = (
+        select(TrainerSchedule.id)
+        .where(
+            TrainerSchedule.trainer_id == schedule_schema.trainer_id,
+            TrainerSchedule.date == schedule_schema.date,
+            TrainerSchedule.slots.op('&')(
+                SlotMask.bit(schedule_schema.time)
+            ) != 0,
+        )
+        .exists()
+    )
+    has_balance = (
+        select(Workout.id)
+        .join(
+            RelationUsers,
+            and_(
+                RelationUsers.client_id == Workout.client_id,
+                RelationUsers.trainer_id == Workout.trainer_id,
+            ),
+        )
+        .where(
+            Workout.client_id == schedule_schema.client_id,
+            Workout.trainer_id == schedule_schema.trainer_id,
+            Workout.workouts > 0,
+        )
+        .exists()
+    )
+    schedule_inserted = (
+        insert(Schedule.__table__)
+        .from_select(
+            [
+                Schedule.client_id,
+                Schedule.trainer_id,
+                Schedule.date,
+                Schedule.time,
+            ],
+            select(
+                literal(schedule_schema.client_id, BigInteger),
+                literal(schedule_schema.trainer_id, BigInteger),
+                literal(schedule_schema.date, Date),
+                literal(schedule_schema.time, Integer),
+            )
+            .where(in_hours, has_balance),
+        )
+        .on_conflict_do_nothing(
+            index_elements=[
+                Schedule.trainer_id, Schedule.date, Schedule.time,
+            ]
+        )
+        .returning(Schedule.id)
+        .cte('schedule_inserted')
+    )
+    workout_debited = (
+        update(Workout.__table__)
+        .where(
+            Workout.client_id == schedule_schema.client_id,
+            Workout.trainer_id == schedule_schema.trainer_id,
+            Workout.workouts > 0,
+            select(schedule_inserted.c.id).exists(),
+        )
+        .values(workouts=Workout.workouts - 1)
+        .returning(Workout.workouts)
+        .cte('workout_debited')
+    )
+    slot_bit: int = SlotMask.bit(schedule_schema.time)
+    availability_claimed = (
+        update(Availability.__table__)
+        .where(
+            Availability.trainer_id == schedule_schema.trainer_id,
+            Availability.date == schedule_schema.date,
+            Availability.free_mask.op('&')(slot_bit) != 0,
+            select(schedule_inserted.c.id).exists(),
+        )
+        .values(
+            free_mask=Availability.free_mask.op('#')(slot_bit),
+            free_count=Availability.free_count - 1,
+        )
+        .cte('availability_claimed')
     )
-
     stmt = (
-        select(Client)
-        .where(Client.id == client_id)
-        .options(selectinload(Client.trainers))
-        .options(selectinload(Client.workouts))
+        select(
+            in_hours.label('in_hours'),
+            has_balance.label('has_balance'),
+            select(schedule_inserted.c.id)
+            .scalar_subquery()
+            .label('schedule_id'),
+            select(workout_debited.c.workouts)
+            .scalar_subquery()
+            .label('workouts'),
+        )
+        .add_cte(availability_claimed)
     )
 
-    client: Client = await session.scalar(stmt)
-    if client is None:
-        return
-
-    trainer = None
-    for tr in client.trainers:  # Trainer
-        if tr.id == trainer_id:
-            schedule.trainer = tr
-            trainer = tr
-            break
-    if trainer is None:
-        return
-
-    workout = None
-    for wrk in client.workouts:
-        if wrk.client_id == client_id:
-            wrk.workouts -= 1
-            workout = wrk
-            break
-    if workout is None:
-        return
-
-    schedule.client = client
-
-    session.add(schedule)
+    result = await session.execute(stmt)
+    row = result.one()
+
+    if not row.in_hours:
+        status = BookingStatus.NOT_IN_HOURS
+    elif not row.has_balance:
+        status = BookingStatus.NO_BALANCE
+    elif row.schedule_id is None:
+        status = BookingStatus.SLOT_TAKEN
+    elif row.workouts is None:
+        # Остаток обнулился параллельной записью после проверки,
+        # вставленная запись отменяется вместе с транзакцией.
+        status = BookingStatus.NO_BALANCE
+    else:
+        session.add_all(outbox)
+        await session.commit()
+        return BookingResult(
+            status=BookingStatus.BOOKED,
+            workouts=row.workouts,
+            schedule_id=row.schedule_id,
+        )
 
-    await session.commit()
+    await session.rollback()
 
-    return schedule
+    return BookingResult(status=status)
 
 
 async def cancel_training_db(
     dialog_manager: DialogManager,
     selected_date: str,
     trainer_id: int,
-    trainings: list[dict]
+    trainings: list[dict],
+    outbox: Iterable[Outbox] = ()
 ) -> list[dict] | None:
     """
     Отменяет записи на тренировку.
+
+    Выбранные записи Schedule удаляются одним DELETE ... RETURNING,
+    тренировки возвращаются клиентам одним сгруппированным UPDATE в том же
+    выражении. Освободившиеся часы возвращаются в маску Availability, а
+    при отмене рабочего дня записи TrainerSchedule и Availability
+    удаляются этим же выражением. События outbox фиксируются в той же
+    транзакции. Если какая-либо запись не найдена, транзакция
+    откатывается и возвращается None.
     """
 
-    session: AsyncSession = dialog_manager.middleware_data.get(SESSION)
+    session: AsyncSession = _get_session(dialog_manager)
 
     dt: datetime = datetime.fromisoformat(selected_date)
 
     canceled_trainings = []
     is_work: bool = dialog_manager.dialog_data.get(IS_WORK, False)
 
-    for training in trainings:
-        stmt_schedule = (
-            select(Schedule)
+    trainer_schedule_deleted = (
+        delete(TrainerSchedule.__table__)
+        .where(
+            TrainerSchedule.trainer_id == trainer_id,
+            TrainerSchedule.date == dt.date(),
+        )
+        .returning(TrainerSchedule.id)
+        .cte('trainer_schedule_deleted')
+    )
+    count_trainer_schedule = (
+        select(func.count())
+        .select_from(trainer_schedule_deleted)
+        .scalar_subquery()
+        .label('trainer_schedules')
+    )
+    availability_deleted = (
+        delete(Availability.__table__)
+        .where(
+            Availability.trainer_id == trainer_id,
+            Availability.date == dt.date(),
+        )
+        .cte('availability_deleted')
+    )
+
+    if trainings:
+        schedule_deleted = (
+            delete(Schedule.__table__)
             .where(
-                Schedule.client_id == training[CLIENT_ID],
                 Schedule.trainer_id == trainer_id,
                 Schedule.date == dt.date(),
-                Schedule.time == training[TIME]
+                tuple_(Schedule.client_id, Schedule.time).in_(
+                    [
+                        (training[CLIENT_ID], training[TIME])
+                        for training in trainings
+                    ]
+                ),
             )
+            .returning(Schedule.client_id, Schedule.date, Schedule.time)
+            .cte('schedule_deleted')
         )
-
-        stmt_workout = (
-            select(Workout)
+        refunds = (
+            select(
+                schedule_deleted.c.client_id,
+                func.count().label('refund'),
+            )
+            .group_by(schedule_deleted.c.client_id)
+            .subquery('refunds')
+        )
+        workout_refunded = (
+            update(Workout.__table__)
             .where(
-                Workout.client_id == training[CLIENT_ID],
                 Workout.trainer_id == trainer_id,
+                Workout.client_id == refunds.c.client_id,
             )
+            .values(workouts=Workout.workouts + refunds.c.refund)
+            .returning(Workout.client_id, Workout.workouts)
+            .cte('workout_refunded')
         )
-
-        result_schedule = await session.execute(stmt_schedule)
-        result_workout = await session.execute(stmt_workout)
-        schedule: Schedule = result_schedule.scalar_one_or_none()
-        workout: Workout = result_workout.scalar_one_or_none()
-        if schedule and workout:
-            workout.workouts += 1
-            canceled_trainings.append(
-                {'schedule': schedule, 'workout': workout}
+        stmt = (
+            select(
+                schedule_deleted.c.client_id,
+                schedule_deleted.c.date,
+                schedule_deleted.c.time,
+                workout_refunded.c.workouts,
             )
-            await session.delete(schedule)
-        else:
-            return
-
-    if is_work:
-        stmt_trainer_schedule = (
-            select(TrainerSchedule)
-            .where(
-                TrainerSchedule.trainer_id == trainer_id,
-                TrainerSchedule.date == dt.date(),
+            .join(
+                workout_refunded,
+                workout_refunded.c.client_id == schedule_deleted.c.client_id,
             )
+            .order_by(schedule_deleted.c.time)
         )
-        result_trainer_schedule = await session.execute(
-            stmt_trainer_schedule
-        )
-        trainer_schedule: TrainerSchedule = \
-            result_trainer_schedule.scalar_one_or_none()
-        if trainer_schedule:
-            await session.delete(trainer_schedule)
-            if IS_WORK in dialog_manager.dialog_data:
-                del dialog_manager.dialog_data[IS_WORK]
+        if is_work:
+            stmt = (
+                stmt
+                .add_columns(count_trainer_schedule)
+                .add_cte(availability_deleted)
+            )
         else:
-            return
+            released = (
+                select(
+                    func.coalesce(
+                        func.bit_or(
+                            literal(1).op('<<')(schedule_deleted.c.time)
+                        ),
+                        0,
+                    )
+                )
+                .scalar_subquery()
+            )
+            free_mask = Availability.free_mask.op('|')(released)
+            availability_released = (
+                update(Availability.__table__)
+                .where(
+                    Availability.trainer_id == trainer_id,
+                    Availability.date == dt.date(),
+                )
+                .values(free_mask=free_mask, free_count=_slot_count(free_mask))
+                .cte('availability_released')
+            )
+            stmt = stmt.add_cte(availability_released)
 
+    elif is_work:
+        stmt = select(count_trainer_schedule).add_cte(availability_deleted)
+
+    else:
+        return canceled_trainings
+
+    result = await session.execute(stmt)
+    rows = result.all()
+
+    if trainings and len(rows) != len(trainings):
+        await session.rollback()
+        return
+
+    if is_work and not rows[0].trainer_schedules:
+        await session.rollback()
+        return
+
+    for row in rows if trainings else ():
+        canceled_trainings.append(
+            {
+                SCHEDULE: set_schedule(
+                    client_id=row.client_id,
+                    trainer_id=trainer_id,
+                    date=row.date,
+                    time=row.time,
+                ),
+                WORKOUT: set_workout(
+                    trainer_id=trainer_id,
+                    workouts=row.workouts,
+                    client_id=row.client_id,
+                ),
+            }
+        )
+
+    session.add_all(outbox)
     await session.commit()
 
+    if IS_WORK in dialog_manager.dialog_data:
+        del dialog_manager.dialog_data[IS_WORK]
+
     return canceled_trainings
 
 
@@ -531,7 +1009,7 @@ async def get_clients_training(
    день для тренера.
     """
 
-    session: AsyncSession = dialog_manager.middleware_data.get(SESSION)
+    session: AsyncSession = _get_read_session(dialog_manager)
 
     dt = datetime.fromisoformat(date_)
     trainer_id: int = trainer_id or dialog_manager.event.from_user.id
@@ -552,32 +1030,85 @@ async def get_clients_training(
     return trainings
 
 
+async def get_free_slots(
+    dialog_manager: DialogManager,
+    trainer_id: int,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    primary: bool = False,
+) -> dict[str, list[int]]:
+    """
+    Возвращает свободные часы тренера по датам в окне
+    [date_from, date_to), по умолчанию — начиная с текущей даты.
+
+    Данные читаются одним диапазонным сканированием первичного ключа
+    (trainer_id, date) таблицы Availability. В результат попадают только
+    даты со свободными часами: {'2025-12-12': [9, 10, ...], ...}.
+    С primary=True чтение идёт с основного сервера: так загружаются
+    данные для кэша, которые не должны отставать от реплики.
+    """
+
+    session: AsyncSession = (
+        dialog_manager.middleware_data.get(SESSION) if primary
+        else _get_read_session(dialog_manager)
+    )
+
+    if date_from is None:
+        timezone: str = dialog_manager.start_data.get(TIME_ZONE)
+        date_from = get_today(timezone)
+
+    stmt = (
+        select(Availability.date, Availability.free_mask)
+        .where(
+            Availability.trainer_id == trainer_id,
+            Availability.date >= date_from,
+            Availability.free_count > 0,
+        )
+        .order_by(Availability.date)
+    )
+    if date_to is not None:
+        stmt = stmt.where(Availability.date < date_to)
+
+    result = await session.execute(stmt)
+
+    return {
+        date_.isoformat(): SlotMask(free_mask).hours
+        for date_, free_mask in result
+    }
+
+
 async def get_trainer_schedules(
     dialog_manager: DialogManager,
-    trainer_id: int = None
+    trainer_id: int = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
 ) -> list[TrainerSchedule]:
     """
-    Функция извлекает из базы данных все записи расписания тренера,
-    дата которых строго больше текущей даты, учитывая часовой
-    пояс пользователя.
+    Функция извлекает из базы данных записи расписания тренера в окне
+    [date_from, date_to). Окно не начинается раньше текущей даты,
+    учитывая часовой пояс пользователя; без date_to выбираются все
+    будущие записи.
     """
 
-    session: AsyncSession = dialog_manager.middleware_data.get(SESSION)
+    session: AsyncSession = _get_read_session(dialog_manager)
 
     timezone: str = dialog_manager.start_data.get(TIME_ZONE)
-    today: datetime = get_current_datetime(timezone)
+    today: date = get_today(timezone)
+    date_from = max(date_from, today) if date_from else today
 
     trainer_id = trainer_id or dialog_manager.event.from_user.id
 
     stmt = (
         select(TrainerSchedule)
-        .join(Trainer)
         .where(
-            Trainer.id == trainer_id,
-            TrainerSchedule.date >= today.date()
+            TrainerSchedule.trainer_id == trainer_id,
+            TrainerSchedule.date >= date_from
         )
         .order_by(TrainerSchedule.date)
     )
+    if date_to is not None:
+        stmt = stmt.where(TrainerSchedule.date < date_to)
+
     result = await session.execute(stmt)
     schedules: list[TrainerSchedule] = result.scalars().all()
 
@@ -593,7 +1124,7 @@ async def get_trainer_schedule(
     Получает расписание тренировок тренера на указанную дату.
     """
 
-    session: AsyncSession = dialog_manager.middleware_data.get(SESSION)
+    session: AsyncSession = _get_session(dialog_manager)
 
     dt: datetime = datetime.fromisoformat(selected_date)
 
@@ -612,21 +1143,31 @@ async def get_trainer_schedule(
 
 async def get_schedules(
     dialog_manager: DialogManager,
-    trainer_id: int
+    trainer_id: int,
+    date_from: date | None = None,
+    date_to: date | None = None,
 ) -> list[Schedule]:
+    """
+    Возвращает записи на тренировки тренера после текущей даты в окне
+    [date_from, date_to), по умолчанию — все будущие.
+    """
 
-    session: AsyncSession = dialog_manager.middleware_data.get(SESSION)
+    session: AsyncSession = _get_read_session(dialog_manager)
 
     timezone: str = dialog_manager.start_data.get(TIME_ZONE)
-    today: datetime = get_current_datetime(timezone)
+    today: date = get_today(timezone)
 
     stmt = (
         select(Schedule)
         .where(
             Schedule.trainer_id == trainer_id,
-            Schedule.date > today.date()
+            Schedule.date > today
         )
     )
+    if date_from is not None:
+        stmt = stmt.where(Schedule.date >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(Schedule.date < date_to)
 
     result = await session.execute(stmt)
 
@@ -643,17 +1184,17 @@ async def get_client_trainings(
     тренировок клиента у конкретного тренера.
     """
 
-    session: AsyncSession = dialog_manager.middleware_data.get(SESSION)
+    session: AsyncSession = _get_read_session(dialog_manager)
 
     timezone: str = dialog_manager.start_data.get(TIME_ZONE)
-    today: datetime = get_current_datetime(timezone)
+    today: date = get_today(timezone)
 
     stmt = (
         select(Schedule)
         .where(
             Schedule.trainer_id == trainer_id,
             Schedule.client_id == client_id,
-            Schedule.date >= today.date()
+            Schedule.date >= today
         )
     )
 
@@ -662,24 +1203,90 @@ async def get_client_trainings(
     return result.scalars().all()
 
 
-async def get_trainers(
+async def resolve_roles(
     dialog_manager: DialogManager,
-) -> list[Trainer] | None:
+    user_id: int,
+) -> UserRoles:
     """
-    Получает список объектов Trainer, связанных с текущим клиентом.
+    Определяет роли пользователя одним запросом: строки Client и Trainer
+    присоединяются к его id через LEFT JOIN, тренеры клиента собираются
+    в JSON-массив подзапросом. Результат кэшируется на ROLES_CACHE_TTL
+    секунд и сбрасывается при создании клиента, тренера или вступлении
+    в группу.
     """
 
-    session: AsyncSession = dialog_manager.middleware_data.get(SESSION)
+    async def load() -> UserRoles:
+
+        session: AsyncSession = _get_read_session(dialog_manager)
+
+        user = select(literal(user_id, BigInteger).label(ID)).subquery()
+        client_trainer = aliased(Trainer)
+
+        trainers = (
+            select(
+                func.json_agg(
+                    aggregate_order_by(
+                        func.json_build_object(
+                            ID, client_trainer.id,
+                            NAME, client_trainer.name,
+                            TIME_ZONE, client_trainer.time_zone,
+                        ),
+                        client_trainer.id,
+                    ),
+                    type_=JSON,
+                )
+            )
+            .join(
+                RelationUsers,
+                RelationUsers.trainer_id == client_trainer.id,
+            )
+            .where(RelationUsers.client_id == user_id)
+            .scalar_subquery()
+        )
+
+        stmt = (
+            select(
+                Client.id, Client.name,
+                Trainer.id, Trainer.name, Trainer.time_zone,
+                trainers,
+            )
+            .select_from(user)
+            .outerjoin(Client, Client.id == user.c.id)
+            .outerjoin(Trainer, Trainer.id == user.c.id)
+        )
+
+        row = (await session.execute(stmt)).one()
+        (client_id, client_name, trainer_id, trainer_name, time_zone,
+         client_trainers) = row
+
+        return UserRoles(
+            client=None if client_id is None else {
+                ID: client_id,
+                NAME: client_name,
+            },
+            trainer=None if trainer_id is None else {
+                ID: trainer_id,
+                NAME: trainer_name,
+                TIME_ZONE: time_zone,
+            },
+            trainers=tuple(client_trainers or ()),
+        )
 
-    client_id: int = dialog_manager.event.from_user.id
+    return await user_roles.get_or_load(user_id, load)
 
-    stmt = (
-        select(Client)
-        .where(Client.id == client_id)
-        .options(selectinload(Client.trainers))
-    )
 
-    result: Client | None = await session.scalar(stmt)
+async def get_trainers(
+    dialog_manager: DialogManager,
+) -> tuple[dict[str, Any], ...] | None:
+    """
+    Получает данные тренеров (Trainer.get_data), связанных с текущим
+    клиентом, или None, если клиент не найден.
+    """
+
+    roles: UserRoles = await resolve_roles(
+        dialog_manager=dialog_manager,
+        user_id=dialog_manager.event.from_user.id,
+    )
 
-    if result is not None:
-        return result.trainers
+    if roles.client is not None:
+        return roles.trainers
@@ -0,0 +1,8 @@
+from .migrations import Migration, MIGRATIONS, run_migrations
+
+
+__all__ = [
+    Migration,
+    MIGRATIONS,
+    run_migrations,
+]
@@ -0,0 +1,267 @@
+import logging
+
+from dataclasses import dataclass
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from db.models import Base
+
+
+logger = logging.getLogger(__name__)
+
+LOCK_ID = 7204531  # ключ advisory-блокировки на время миграций
+TRAINER_TABLE = 'trainer'
+
+# Переводит строку часов '9,10,11' в битовую маску, бит i — час i.
+# Пустые и некорректные элементы (например, после завершающей запятой)
+# пропускаются.
+_HOURS_TO_MASK = (
+    "SELECT coalesce(bit_or(CASE WHEN h ~ '^[0-9]{{1,2}}$' "
+    "AND h::integer < 24 THEN 1 << h::integer ELSE 0 END), 0) "
+    "FROM unnest(string_to_array(\"{column}\", ',')) AS h"
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    """
+    Версионированная миграция схемы базы данных.
+
+    Все выражения одной миграции выполняются в общей транзакции
+    вместе с записью номера версии в таблицу schema_version.
+    """
+
+    version: int
+    description: str
+    statements: tuple[str, ...] = ()
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(
+        version=1,
+        description='Базовая схема (Base.metadata.create_all)',
+    ),
+    Migration(
+        version=2,
+        description='Индексы и ограничения уникальности таблиц записи',
+        statements=(
+            # Перед созданием уникальных индексов убираем дубликаты,
+            # которые могли появиться из-за гонок при записи. Из записей
+            # на одно время остаётся первая, за каждую удалённую клиенту
+            # возвращается списанная тренировка (в первую запись workout,
+            # которая останется после объединения ниже).
+            'WITH deleted AS ('
+            'DELETE FROM schedule a USING schedule b '
+            'WHERE a.trainer_id = b.trainer_id AND a.date = b.date '
+            'AND a.time = b.time AND a.id > b.id '
+            'RETURNING a.client_id, a.trainer_id) '
+            'UPDATE workout w SET workouts = w.workouts + r.refund '
+            'FROM (SELECT client_id, trainer_id, count(*) AS refund '
+            'FROM deleted GROUP BY client_id, trainer_id) r '
+            'WHERE w.id = (SELECT min(id) FROM workout '
+            'WHERE client_id = r.client_id AND trainer_id = r.trainer_id)',
+            'DELETE FROM trainer_schedule a USING trainer_schedule b '
+            'WHERE a.trainer_id = b.trainer_id AND a.date = b.date '
+            'AND a.id > b.id',
+            # Остаток тренировок дубликатов суммируется в первую запись,
+            # чтобы клиент не потерял оплаченные занятия.
+            'UPDATE workout w SET workouts = d.total '
+            'FROM (SELECT min(id) AS id, sum(workouts) AS total '
+            'FROM workout GROUP BY client_id, trainer_id '
+            'HAVING count(*) > 1) d '
+            'WHERE w.id = d.id',
+            'DELETE FROM workout a USING workout b '
+            'WHERE a.client_id = b.client_id '
+            'AND a.trainer_id = b.trainer_id AND a.id > b.id',
+            'DELETE FROM working_day a USING working_day b '
+            'WHERE a.trainer_id = b.trainer_id AND a.item = b.item '
+            'AND a.id > b.id',
+            'CREATE UNIQUE INDEX IF NOT EXISTS uq_schedule_trainer_date_time '
+            'ON schedule (trainer_id, date, time)',
+            'CREATE INDEX IF NOT EXISTS ix_schedule_client_trainer_date '
+            'ON schedule (client_id, trainer_id, date)',
+            'CREATE UNIQUE INDEX IF NOT EXISTS '
+            'uq_trainer_schedule_trainer_date '
+            'ON trainer_schedule (trainer_id, date)',
+            'CREATE UNIQUE INDEX IF NOT EXISTS uq_workout_client_trainer '
+            'ON workout (client_id, trainer_id)',
+            'CREATE UNIQUE INDEX IF NOT EXISTS uq_working_day_trainer_item '
+            'ON working_day (trainer_id, item)',
+        ),
+    ),
+    Migration(
+        version=3,
+        description='Индексы по дате для очистки устаревших данных',
+        statements=(
+            'CREATE INDEX IF NOT EXISTS ix_schedule_date '
+            'ON schedule (date)',
+            'CREATE INDEX IF NOT EXISTS ix_trainer_schedule_date '
+            'ON trainer_schedule (date)',
+        ),
+    ),
+    Migration(
+        version=4,
+        description='Битовые маски часов вместо строк в trainer_schedule '
+                    'и working_day',
+        statements=(
+            'ALTER TABLE trainer_schedule '
+            'ADD COLUMN slots INTEGER NOT NULL DEFAULT 0',
+            'UPDATE trainer_schedule SET slots = ('
+            + _HOURS_TO_MASK.format(column='time') + ')',
+            'ALTER TABLE trainer_schedule ALTER COLUMN slots DROP DEFAULT',
+            'ALTER TABLE trainer_schedule DROP COLUMN time',
+            'ALTER TABLE working_day '
+            'ADD COLUMN slots INTEGER NOT NULL DEFAULT 0',
+            'UPDATE working_day SET slots = ('
+            + _HOURS_TO_MASK.format(column='work') + ')',
+            'ALTER TABLE working_day ALTER COLUMN slots DROP DEFAULT',
+            'ALTER TABLE working_day DROP COLUMN work',
+        ),
+    ),
+    Migration(
+        version=5,
+        description='Таблица свободных часов тренеров availability',
+        statements=(
+            'CREATE TABLE IF NOT EXISTS availability ('
+            'trainer_id BIGINT NOT NULL REFERENCES trainer (id), '
+            'date DATE NOT NULL, '
+            'free_mask INTEGER NOT NULL, '
+            'free_count INTEGER NOT NULL, '
+            'PRIMARY KEY (trainer_id, date))',
+            'INSERT INTO availability '
+            '(trainer_id, date, free_mask, free_count) '
+            'SELECT ts.trainer_id, ts.date, f.free_mask, '
+            'bit_count(f.free_mask::bit(24)) '
+            'FROM trainer_schedule ts CROSS JOIN LATERAL ('
+            'SELECT ts.slots & ~coalesce(bit_or(1 << s.time), 0) '
+            'AS free_mask FROM schedule s '
+            'WHERE s.trainer_id = ts.trainer_id AND s.date = ts.date) f '
+            'ON CONFLICT (trainer_id, date) DO NOTHING',
+            'CREATE INDEX IF NOT EXISTS ix_availability_date '
+            'ON availability (date)',
+        ),
+    ),
+    Migration(
+        version=6,
+        description='Таблица исходящих событий outbox',
+        statements=(
+            'CREATE TABLE IF NOT EXISTS outbox ('
+            'id BIGSERIAL PRIMARY KEY, '
+            'kind VARCHAR NOT NULL, '
+            'payload JSONB NOT NULL, '
+            'created_at TIMESTAMPTZ NOT NULL DEFAULT now())',
+        ),
+    ),
+)
+
+
+async def _get_current_version(conn: AsyncConnection) -> int | None:
+    """
+    Возвращает номер последней применённой миграции или None,
+    если миграции ещё ни разу не выполнялись.
+    """
+
+    result = await conn.execute(
+        text('SELECT max(version) FROM schema_version')
+    )
+
+    return result.scalar()
+
+
+async def _set_version(conn: AsyncConnection, migration: Migration) -> None:
+
+    await conn.execute(
+        text(
+            'INSERT INTO schema_version (version, description) '
+            'VALUES (:version, :description)'
+        ),
+        {
+            'version': migration.version,
+            'description': migration.description,
+        },
+    )
+
+
+async def _init_schema(conn: AsyncConnection) -> int:
+    """
+    Инициализирует учёт версий схемы.
+
+    Для пустой базы данных создаёт актуальную схему через create_all и
+    отмечает все миграции применёнными. Для базы, созданной до появления
+    миграций, отмечает только базовую версию, остальные миграции будут
+    применены поверх неё.
+    """
+
+    has_tables: bool = await conn.run_sync(
+        lambda sync_conn: inspect(sync_conn).has_table(TRAINER_TABLE)
+    )
+
+    if has_tables:
+        baseline: Migration = MIGRATIONS[0]
+        await _set_version(conn, baseline)
+        logger.info(
+            'Существующая схема отмечена базовой версией %s',
+            baseline.version,
+        )
+        return baseline.version
+
+    await conn.run_sync(Base.metadata.create_all, checkfirst=True)
+    for migration in MIGRATIONS:
+        await _set_version(conn, migration)
+    logger.info(
+        'Создана новая схема базы данных версии %s',
+        MIGRATIONS[-1].version,
+    )
+
+    return MIGRATIONS[-1].version
+
+
+async def run_migrations(engine: AsyncEngine) -> int:
+    """
+    Приводит схему базы данных к последней версии.
+
+    Миграции выполняются в одной транзакции под advisory-блокировкой,
+    поэтому одновременный запуск нескольких процессов безопасен.
+    Возвращает номер версии схемы после применения миграций.
+    """
+
+    async with engine.begin() as conn:
+        # Миграции обходят таблицы целиком, а ожидание блокировки длится
+        # всё время миграции другого процесса: таймауты, заданные для
+        # запросов приложения, снимаются до конца транзакции.
+        await conn.execute(text('SET LOCAL statement_timeout = 0'))
+        await conn.execute(
+            text('SET LOCAL idle_in_transaction_session_timeout = 0')
+        )
+        await conn.execute(
+            text('SELECT pg_advisory_xact_lock(:lock_id)'),
+            {'lock_id': LOCK_ID},
+        )
+        await conn.execute(
+            text(
+                'CREATE TABLE IF NOT EXISTS schema_version ('
+                'version INTEGER PRIMARY KEY, '
+                'description VARCHAR NOT NULL, '
+                'applied_at TIMESTAMPTZ NOT NULL DEFAULT now())'
+            )
+        )
+
+        current: int | None = await _get_current_version(conn)
+        if current is None:
+            current = await _init_schema(conn)
+
+        for migration in MIGRATIONS:
+            if migration.version <= current:
+                continue
+
+            for statement in migration.statements:
+                await conn.execute(text(statement))
+            await _set_version(conn, migration)
+            current = migration.version
+
+            logger.info(
+                'Применена миграция %s: %s',
+                migration.version, migration.description,
+            )
+
+    return current
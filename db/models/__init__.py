@@ -1,8 +1,11 @@
 from datetime import date
+from typing import Any
 
 from .models import (
+    Availability,
     Base,
     Client,
+    Outbox,
     RelationUsers,
     Schedule,
     Trainer,
@@ -66,26 +69,26 @@ def set_schedule(
 
 def set_work_day(
     item: str,
-    work: str,
+    slots: int,
     trainer_id: int
 ) -> WorkingDay:
 
     return WorkingDay(
         item=item,
-        work=work,
+        slots=slots,
         trainer_id=trainer_id,
     )
 
 
 def set_trainer_schedule(
     date: date,
-    time: str,
+    slots: int,
     trainer_id: int
 ) -> TrainerSchedule:
 
     return TrainerSchedule(
         date=date,
-        time=time,
+        slots=slots,
         trainer_id=trainer_id,
     )
 
@@ -101,9 +104,22 @@ def set_relation_users(
     )
 
 
+def set_outbox(
+    kind: str,
+    payload: dict[str, Any]
+) -> Outbox:
+
+    return Outbox(
+        kind=kind,
+        payload=payload,
+    )
+
+
 __all__ = [
+    Availability,
     Base,
     Client,
+    Outbox,
     RelationUsers,
     Schedule,
     Trainer,
@@ -111,6 +127,7 @@ __all__ = [
     WorkingDay,
     Workout,
     set_client,
+    set_outbox,
     set_relation_users,
     set_schedule,
     set_trainer,
@@ -1,5 +1,15 @@
-from datetime import date as dt
-from sqlalchemy import BigInteger, Date, ForeignKey, Integer,  String
+from datetime import date as dt, datetime
+from sqlalchemy import (
+    BigInteger,
+    Date,
+    DateTime,
+    ForeignKey,
+    func,
+    Index,
+    Integer,
+    String,
+)
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from typing import Any
 
@@ -94,6 +104,13 @@ class RelationUsers(Base):
 class Workout(Base):
 
     __tablename__ = 'workout'
+    __table_args__ = (
+        Index(
+            'uq_workout_client_trainer',
+            'client_id', 'trainer_id',
+            unique=True,
+        ),
+    )
 
     id: Mapped[int] = mapped_column(
         Integer,
@@ -122,6 +139,18 @@ class Workout(Base):
 class Schedule(Base):
 
     __tablename__ = 'schedule'
+    __table_args__ = (
+        Index(
+            'uq_schedule_trainer_date_time',
+            'trainer_id', 'date', 'time',
+            unique=True,
+        ),
+        Index(
+            'ix_schedule_client_trainer_date',
+            'client_id', 'trainer_id', 'date',
+        ),
+        Index('ix_schedule_date', 'date'),
+    )
 
     id: Mapped[int] = mapped_column(
         Integer,
@@ -155,6 +184,13 @@ class Schedule(Base):
 class WorkingDay(Base):
 
     __tablename__ = 'working_day'
+    __table_args__ = (
+        Index(
+            'uq_working_day_trainer_item',
+            'trainer_id', 'item',
+            unique=True,
+        ),
+    )
 
     id: Mapped[int] = mapped_column(
         Integer,
@@ -162,7 +198,7 @@ class WorkingDay(Base):
         autoincrement=True,
     )
     item: Mapped[str] = mapped_column(String)
-    work: Mapped[str] = mapped_column(String)
+    slots: Mapped[int] = mapped_column(Integer)  # SlotMask
     trainer_id: Mapped[int] = mapped_column(
         BigInteger,
         ForeignKey('trainer.id'),
@@ -177,13 +213,21 @@ class WorkingDay(Base):
 
         return {
             'item': self.item,
-            'work': self.work,
+            'slots': self.slots,
         }
 
 
 class TrainerSchedule(Base):
 
     __tablename__ = 'trainer_schedule'
+    __table_args__ = (
+        Index(
+            'uq_trainer_schedule_trainer_date',
+            'trainer_id', 'date',
+            unique=True,
+        ),
+        Index('ix_trainer_schedule_date', 'date'),
+    )
 
     id: Mapped[int] = mapped_column(
         Integer,
@@ -191,7 +235,7 @@ class TrainerSchedule(Base):
         autoincrement=True,
     )
     date: Mapped[dt] = mapped_column(Date)
-    time: Mapped[str] = mapped_column(String)
+    slots: Mapped[int] = mapped_column(Integer)  # SlotMask
     trainer_id: Mapped[int] = mapped_column(
         BigInteger,
         ForeignKey('trainer.id'),
@@ -206,5 +250,51 @@ class TrainerSchedule(Base):
 
         return {
             'date': self.date,
-            'time': self.time,
+            'slots': self.slots,
+        }
+
+
+class Availability(Base):
+    """
+    Свободные часы тренера на дату, поддерживаемые в тех же транзакциях,
+    что и TrainerSchedule и Schedule.
+    """
+
+    __tablename__ = 'availability'
+    __table_args__ = (
+        Index('ix_availability_date', 'date'),
+    )
+
+    trainer_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey('trainer.id'),
+        primary_key=True,
+    )
+    date: Mapped[dt] = mapped_column(Date, primary_key=True)
+    free_mask: Mapped[int] = mapped_column(Integer)  # SlotMask
+    free_count: Mapped[int] = mapped_column(Integer)
+
+    def get_data(self):
+
+        return {
+            'date': self.date,
+            'free_mask': self.free_mask,
+            'free_count': self.free_count,
         }
+
+
+class Outbox(Base):
+    """
+    Исходящие события: уведомления и задачи напоминаний, записанные в
+    той же транзакции, что и изменения расписания. Публикуются воркером.
+    """
+
+    __tablename__ = 'outbox'
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    kind: Mapped[str] = mapped_column(String)
+    payload: Mapped[dict[str, Any]] = mapped_column(JSONB)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+    )
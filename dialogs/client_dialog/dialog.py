@@ -26,6 +26,7 @@ from .handlers import (
     exist_sign,
     on_date,
     on_date_selected,
+    on_month_changed,
     back_trainings,
     set_calendar,
     set_trainings,
@@ -58,6 +59,7 @@ client_dialog = Dialog(
         CustomCalendar(
             id='cal',
             on_click=on_date_selected,
+            on_month_changed=on_month_changed,
         ),
         Row(
             SwitchTo(
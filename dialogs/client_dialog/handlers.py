@@ -1,4 +1,3 @@
-import asyncio
 import logging
 
 from aiogram.types import CallbackQuery
@@ -7,162 +6,74 @@ from aiogram_dialog.api.entities.context import Context
 from aiogram_dialog.api.internal import RawKeyboard
 from aiogram_dialog.widgets.kbd import (
     Button,
-    Calendar,
-    CalendarScope,
     ManagedCalendar,
     ManagedMultiselect,
     ManagedRadio,
     Radio,
     SwitchTo,
 )
-from aiogram_dialog.widgets.kbd.calendar_kbd import (
-    DATE_TEXT,
-    TODAY_TEXT,
-    CalendarDaysView,
-    CalendarMonthView,
-    CalendarScopeView,
-    CalendarYearsView,
-    CalendarUserConfig,
-)
-from aiogram_dialog.widgets.text import Format, Text
-from babel.dates import get_day_names, get_month_names
-from datetime import date, datetime, time, timedelta
+from cache import AvailabilityCache
+from datetime import date
 from sqlalchemy.exc import SQLAlchemyError
-from taskiq.scheduler.scheduled_task import ScheduledTask
-from zoneinfo import ZoneInfo
 
 from db import (
     add_training,
+    BookingResult,
+    BookingStatus,
     cancel_training_db,
     get_client_trainings,
-    get_schedules,
-    get_schedule_exsists,
-    get_trainer_schedule,
-    get_trainer_schedules,
+    get_free_slots,
     get_workouts,
+    Outbox,
     Schedule,
-    TrainerSchedule,
     Workout,
 )
-from notification import send_notification
-from schemas import ScheduleSchema
 from states import ClientState
-from tasks import send_scheduled_notification
-from taskiq_broker import schedule_source
-from timezones import get_current_datetime
+from tasks import notification_event
+from timezones import get_today
+from widgets import ManagedWindowedCalendar, MarkedCalendar, month_window
 
 
 logger = logging.getLogger(__name__)
 
+AVAILABILITY_CACHE = 'availability_cache'
+CALENDAR = 'cal'
 DATE = 'date'
+DAY_MARKS = '🔴🟢'  # отметка дня по значению MY_SIGN
 EXIST = 'exist'
 MY_SIGN = 'my_sign'
 RAD_SCHED = 'rad_sched'
 SEL_D = 'sel_d'
 SELECTED_DATE = 'selected_date'
 SELECTED_DATES = 'selected_dates'
+TIME = 'time'
 TIME_ZONE = 'time_zone'
+TODAY_MARK = '⭕'
 TRAINER_ID = 'trainer_id'
+WORKOUT = 'workout'
 WORKOUTS = 'workouts'
 
 
-def _split_time(value: str, delimiter=',') -> list[int]:
-
-    return list(map(int, value.split(delimiter)))
-
-
-class WeekDay(Text):
-
-    async def _render_text(self, data, dialog_manager: DialogManager) -> str:
-
-        selected_date: date = data[DATE]
-        locale = dialog_manager.event.from_user.language_code
-
-        return get_day_names(
-            width='short', context='stand-alone', locale=locale,
-        )[selected_date.weekday()].title()
-
-
-class MarkedDay(Text):
-
-    def __init__(self, mark: str, other: Text):
-
-        super().__init__()
-        self.mark = mark
-        self.other = other
-
-    async def _render_text(self, data, dialog_manager: DialogManager) -> str:
-
-        current_date: date = data[DATE]
-        serial_date = current_date.isoformat()
-        selected = dialog_manager.dialog_data.get(SELECTED_DATES, {})
+class CustomCalendar(MarkedCalendar):
 
-        if serial_date in selected:
-            item_mark: int = dialog_manager.dialog_data.get(MY_SIGN, 0)
-            return self.mark[item_mark]
-
-        return await self.other.render_text(data, dialog_manager)
-
-
-class Month(Text):
-
-    async def _render_text(self, data, dialog_manager: DialogManager) -> str:
-
-        selected_date: date = data[DATE]
-        locale = dialog_manager.event.from_user.language_code
-
-        return get_month_names(
-            'wide', context='stand-alone', locale=locale,
-        )[selected_date.month].title()
-
-
-class CustomCalendar(Calendar):
-
-    def _init_views(self) -> dict[CalendarScope, CalendarScopeView]:
-
-        return {
-            CalendarScope.DAYS: CalendarDaysView(
-                self._item_callback_data,
-                date_text=MarkedDay("🔴🟢", DATE_TEXT),
-                today_text=MarkedDay("⭕⭕", TODAY_TEXT),
-                header_text='~~~~~ ' + Month() + ' ~~~~~',
-                weekday_text=WeekDay(),
-                next_month_text=Month() + ' >>',
-                prev_month_text='<< ' + Month(),
-            ),
-            CalendarScope.MONTHS: CalendarMonthView(
-                self._item_callback_data,
-                month_text=Month(),
-                header_text='~~~~~ ' + Format('{date:%Y}') + ' ~~~~~',
-                this_month_text='[' + Month() + ']',
-            ),
-            CalendarScope.YEARS: CalendarYearsView(
-                self._item_callback_data,
-            ),
-        }
-
-    async def _get_user_config(
+    def _mark_days(
             self,
-            data: dict,
             manager: DialogManager,
-    ) -> CalendarUserConfig:
+            today: date,
+    ) -> dict[str, str]:
         """
-        User related config getter.
-
-        Override this method to customize how user config is retrieved.
-
-        :param data: data from window getter
-        :param manager: dialog manager instance
-        :return:
+        Отмечает дни со свободным временем тренера (или записями
+        клиента), сегодняшний день — отдельной отметкой.
         """
 
-        tz = ZoneInfo(manager.start_data.get(TIME_ZONE))
+        selected: dict = manager.dialog_data.get(SELECTED_DATES, {})
+        mark: str = DAY_MARKS[manager.dialog_data.get(MY_SIGN, 0)]
 
-        calendar_config = CalendarUserConfig(
-            timezone=tz
-        )
+        marks: dict[str, str] = dict.fromkeys(selected, mark)
+        if today.isoformat() in marks:
+            marks[today.isoformat()] = TODAY_MARK
 
-        return calendar_config
+        return marks
 
 
 class CustomRadio(Radio):
@@ -234,27 +145,56 @@ async def update_workouts(
     return workout
 
 
+def _calendar_offset(dialog_manager: DialogManager) -> date:
+    """
+    Возвращает месяц, отображаемый календарём, по умолчанию — текущий.
+    """
+
+    calendar: ManagedWindowedCalendar = dialog_manager.find(CALENDAR)
+
+    return calendar.get_offset() or get_today(
+        dialog_manager.start_data[TIME_ZONE]
+    )
+
+
 async def _update_calendar(
     dialog_manager: DialogManager,
+    offset: date | None = None,
 ) -> dict[str, list[int]] | None:
     """
-    Получает расписание тренера и фильтрует
-    по свободному времени.
+    Получает свободные часы тренера по датам в окне month_window вокруг
+    месяца offset (по умолчанию — отображаемого календарём): из кэша
+    доступности, при промахе — из базы данных с сохранением результата
+    в кэш. Кэш заполняется только с основного сервера: отстающая
+    реплика сохранила бы устаревшие данные под новым поколением.
     """
 
-    trainer_schedules: list[TrainerSchedule]
-    schedules: list[Schedule]
+    trainer_id: int = dialog_manager.start_data[TRAINER_ID]
+    today: date = get_today(dialog_manager.start_data[TIME_ZONE])
+    if offset is None:
+        offset = _calendar_offset(dialog_manager)
+
+    date_from, date_to = month_window(offset)
+    date_from = max(date_from, today)
+    cache: AvailabilityCache | None = \
+        dialog_manager.middleware_data.get(AVAILABILITY_CACHE)
+
+    if date_from >= date_to:
+        return {}
+
+    gen: str = ''
+    if cache is not None:
+        free_slots, gen = await cache.get(trainer_id, date_from, date_to)
+        if free_slots is not None:
+            return free_slots
 
     try:
-        trainer_schedules, schedules = await asyncio.gather(
-            get_trainer_schedules(
-                dialog_manager=dialog_manager,
-                trainer_id=dialog_manager.start_data[TRAINER_ID],
-            ),
-            get_schedules(
-                dialog_manager=dialog_manager,
-                trainer_id=dialog_manager.start_data[TRAINER_ID],
-            )
+        free_slots: dict[str, list[int]] = await get_free_slots(
+            dialog_manager=dialog_manager,
+            trainer_id=trainer_id,
+            date_from=date_from,
+            date_to=date_to,
+            primary=cache is not None,
         )
     except SQLAlchemyError as error:
         logger.error(
@@ -264,23 +204,25 @@ async def _update_calendar(
         )
         return
 
-    data_tr_schedules: dict[str, list[int]] = {
-        tr_schedule.date.isoformat(): _split_time(tr_schedule.time)
-        for tr_schedule in trainer_schedules
-    }
-
-    for schedule in schedules:  # Schedule
-        schedule_schema: ScheduleSchema = ScheduleSchema(**schedule.get_data())
-        iso_date: str = schedule_schema.date.isoformat()
-        if iso_date in data_tr_schedules:
-            if schedule_schema.time in data_tr_schedules[iso_date]:
-                data_tr_schedules[iso_date].remove(
-                    schedule_schema.time
-                )
-                if not data_tr_schedules[iso_date]:
-                    data_tr_schedules.pop(iso_date)
+    if cache is not None:
+        await cache.set(trainer_id, date_from, date_to, free_slots, gen)
+
+    return free_slots
+
+
+async def _invalidate_availability(
+    dialog_manager: DialogManager,
+    trainer_id: int,
+) -> None:
+    """
+    Сбрасывает кэш доступности тренера после изменения его записей.
+    """
+
+    cache: AvailabilityCache | None = \
+        dialog_manager.middleware_data.get(AVAILABILITY_CACHE)
 
-    return data_tr_schedules
+    if cache is not None:
+        await cache.invalidate(trainer_id)
 
 
 async def set_calendar(
@@ -292,8 +234,9 @@ async def set_calendar(
     Подготавливает виджет календаря согласно расписания тренера.
     """
 
+    offset: date = _calendar_offset(dialog_manager)
     data_schedules: dict[str, list[int]] | None = \
-        await _update_calendar(dialog_manager)
+        await _update_calendar(dialog_manager, offset)
 
     if data_schedules is None:
         await callback.answer(
@@ -303,6 +246,8 @@ async def set_calendar(
         return
 
     dialog_manager.dialog_data[SELECTED_DATES] = data_schedules
+    calendar: ManagedWindowedCalendar = dialog_manager.find(CALENDAR)
+    calendar.set_window(offset)
 
     dialog_manager.dialog_data[MY_SIGN] = 0  # color mark day
 
@@ -317,9 +262,33 @@ async def set_calendar(
     )
 
 
+async def on_month_changed(
+    callback: CallbackQuery,
+    widget: ManagedWindowedCalendar,
+    dialog_manager: DialogManager,
+    offset: date
+) -> None:
+    """
+    Загружает свободные часы тренера для окна нового месяца календаря.
+    """
+
+    data_schedules: dict[str, list[int]] | None = \
+        await _update_calendar(dialog_manager, offset)
+
+    if data_schedules is None:
+        await callback.answer(
+            text='Не удалось получить расписание, попробуйте еще раз.',
+            show_alert=True,
+        )
+        return
+
+    dialog_manager.dialog_data[SELECTED_DATES] = data_schedules
+    widget.set_window(offset)
+
+
 async def on_date_selected(
     callback: CallbackQuery,
-    widget: ManagedCalendar,
+    widget: ManagedWindowedCalendar,
     dialog_manager: DialogManager,
     clicked_date: date
 ) -> None:
@@ -329,8 +298,9 @@ async def on_date_selected(
     переход к следующему шагу - записи на тренировку.
     """
 
+    offset: date = _calendar_offset(dialog_manager)
     data_schedules: dict[str, list[int]] | None = \
-        await _update_calendar(dialog_manager)
+        await _update_calendar(dialog_manager, offset)
     if data_schedules is None:
         await callback.answer(
             text='Произошла ошибка, попробуйте еще раз.',
@@ -343,6 +313,7 @@ async def on_date_selected(
 
     if data_schedules != selected_dates:
         dialog_manager.dialog_data[SELECTED_DATES] = data_schedules
+        widget.set_window(offset)
         await callback.answer(
             text='Данные календаря были изменены, '
             'попробуйте еще раз, пожалуйста',
@@ -387,7 +358,7 @@ async def on_date(
     """
 
     timezone: str = dialog_manager.start_data.get(TIME_ZONE)
-    today: datetime = get_current_datetime(timezone)
+    today: date = get_today(timezone)
 
     client_id: int = dialog_manager.event.from_user.id
     trainer_id: int = dialog_manager.start_data[TRAINER_ID]
@@ -425,7 +396,7 @@ async def on_date(
         dialog_manager.dialog_data[SELECTED_DATE] = \
             clicked_date.isoformat()
 
-        if clicked_date == today.date():
+        if clicked_date == today:
             await dialog_manager.switch_to(
                 state=ClientState.today,
                 show_mode=ShowMode.EDIT,
@@ -472,14 +443,14 @@ async def exist_sign(
 ) -> None:
     """
     Асинхронная функция для обработки записи клиента на тренировку.
-    Проверка доступности времени у тренера,
-    создание записи на тренировку и настройка напоминания для клиента.
+    Проверка доступности времени у тренера и создание записи на
+    тренировку. Напоминание отправит ежедневная рассылка накануне.
     """
 
     context: Context = dialog_manager.current_context()
 
     timezone: str = dialog_manager.start_data.get(TIME_ZONE)
-    today: datetime = get_current_datetime(timezone)
+    today: date = get_today(timezone)
 
     radio_item: str = context.widget_data.get(RAD_SCHED)
 
@@ -491,7 +462,7 @@ async def exist_sign(
     selected_time: int = selected_dates[selected_date][int(radio_item)]
     dialog_manager.dialog_data[EXIST] = False
 
-    if selected_date <= today.date().isoformat():
+    if selected_date <= today.isoformat():
         await callback.answer(
             text='Данные устарели, попробуйте еще раз.',
             show_alert=True,
@@ -503,110 +474,44 @@ async def exist_sign(
         )
         return
 
-    exists_schedule: bool
-    trainer_schedule: TrainerSchedule
-
     try:
-        exists_schedule, trainer_schedule = await asyncio.gather(
-            get_schedule_exsists(
-                dialog_manager=dialog_manager,
-                selected_date=selected_date,
-                selected_time=selected_time,
-                trainer_id=trainer_id,
-            ),
-            get_trainer_schedule(
-                dialog_manager=dialog_manager,
-                trainer_id=trainer_id,
-                selected_date=selected_date,
-            )
+        booking: BookingResult = await add_training(
+            dialog_manager=dialog_manager,
+            selected_date=selected_date,
+            selected_time=selected_time,
+            client_id=client_id,
+            trainer_id=trainer_id,
         )
     except SQLAlchemyError as error:
         logger.error(
-            'Ошибка проверки существования записи и извлечения '
-            'списка расписания тренера trainer_id=%s, client_id=%s, '
-            'selected_date=%s, selected_time=%s, path=%s',
-            trainer_id, client_id, selected_date, selected_time,
-            __name__,
+            'Ошибка при попытке записаться на тренировку '
+            'trainer_id=%s, client_id=%s, date=%s, '
+            'time=%s, path=%s',
+            trainer_id, client_id, selected_date,
+            selected_time, __name__,
             exc_info=error,
         )
         await callback.answer(
-            text='Неудалось записать вас на тренировку, '
+            text='Во время записи произошла ошибка, '
                  'попробуйте еще раз.',
             show_alert=True,
         )
         return
 
-    if not exists_schedule:
-        if trainer_schedule is not None:
-            trainer_times: list[str] = trainer_schedule.time.split(',')
-            if str(selected_time) in trainer_times:
-                try:
-                    schedule: Schedule | None = await add_training(
-                        dialog_manager=dialog_manager,
-                        selected_date=selected_date,
-                        selected_time=selected_time,
-                        client_id=client_id,
-                        trainer_id=trainer_id,
-                    )
-                except SQLAlchemyError as error:
-                    logger.error(
-                        'Ошибка при попытке записаться на тренировку '
-                        'trainer_id=%s, client_id=%s, date=%s, '
-                        'time=%s, path=%s',
-                        trainer_id, client_id, selected_date,
-                        selected_time, __name__,
-                        exc_info=error,
-                    )
-                    await callback.answer(
-                        text='Во время записи произошла ошибка, '
-                             'попробуйте еще раз.',
-                        show_alert=True,
-                    )
-                    return
-
-                if schedule is None:
-                    await callback.answer(
-                        text='Неудалось завершить запись, попробуйте '
-                             'еще раз.',
-                        show_alert=True,
-                    )
-                    return
-
-                dialog_manager.dialog_data[EXIST] = True
-                dialog_manager.start_data[WORKOUTS] -= 1
-
-                datetime_notification = datetime.combine(
-                    date=date.fromisoformat(selected_date)-timedelta(days=1),
-                    time=time(hour=11, minute=00),
-                    tzinfo=ZoneInfo(timezone),
-                )
+    if booking.status == BookingStatus.NO_BALANCE:
+        await callback.answer(
+            text='Неудалось завершить запись, у вас не осталось '
+                 'оплаченных тренировок.',
+            show_alert=True,
+        )
+        return
 
-                if datetime_notification > today:
-
-                    message = (
-                        f'Напоминание о тренировке '
-                        f'{selected_date} в {selected_time}:00'
-                    )
-
-                    sch_id = f'{client_id}_{selected_date}_{selected_time}'
-                    kw = {'chat_id': client_id, 'message_text': message}
-                    await schedule_source.add_schedule(
-                        ScheduledTask(
-                            task_name=send_scheduled_notification.task_name,
-                            labels={},
-                            args=[],
-                            kwargs=kw,
-                            schedule_id=sch_id,
-                            time=datetime_notification,
-                        )
-                    )
-
-                    logger.info(
-                        'Задача об упоминании о тренировке запланирована '
-                        'на дату <%s>, время <%s>',
-                        datetime_notification.date().isoformat(),
-                        datetime_notification.time().isoformat()
-                    )
+    # Запись изменила доступность либо показала, что кэш устарел.
+    await _invalidate_availability(dialog_manager, trainer_id)
+
+    if booking.status == BookingStatus.BOOKED:
+        dialog_manager.dialog_data[EXIST] = True
+        dialog_manager.start_data[WORKOUTS] = booking.workouts
 
     await dialog_manager.switch_to(
         state=ClientState.sign_up,
@@ -739,7 +644,7 @@ async def cancel_training(
 ):
 
     timezone: str = dialog_manager.start_data.get(TIME_ZONE)
-    today: datetime = get_current_datetime(timezone)
+    today: date = get_today(timezone)
 
     context: Context = dialog_manager.current_context()
 
@@ -747,7 +652,7 @@ async def cancel_training(
     client_id: int = dialog_manager.event.from_user.id
     trainer_id: int = dialog_manager.start_data[TRAINER_ID]
 
-    if today.date().isoformat() < selected_date:
+    if today.isoformat() < selected_date:
 
         times: list[int] = \
             dialog_manager.dialog_data[SELECTED_DATES][selected_date]
@@ -760,6 +665,16 @@ async def cancel_training(
             } for item in widget_items
         ]
 
+        client_name: str = dialog_manager.event.from_user.full_name
+        outbox: list[Outbox] = [
+            notification_event(
+                user_id=trainer_id,
+                text=f'❌{client_name} отменил(а) запись: '
+                     f'{selected_date}, {training[TIME]}:00',
+            )
+            for training in canceling_times
+        ]
+
         try:
             result: list[dict[str, Schedule | Workout]] = \
                 await cancel_training_db(
@@ -767,6 +682,7 @@ async def cancel_training(
                     selected_date=selected_date,
                     trainer_id=trainer_id,
                     trainings=canceling_times,
+                    outbox=outbox,
                 )
         except SQLAlchemyError as error:
             logger.error(
@@ -788,31 +704,10 @@ async def cancel_training(
             )
             return
 
-        client_name: str = dialog_manager.event.from_user.full_name
-        schedule: Schedule
-        workout: Workout
-        for row in result:
-            schedule, workout = row.values()
-            message = (
-                f'❌{client_name} отменил(а) запись: '
-                f'{schedule.date.isoformat()}, {schedule.time}:00'
-            )
-            await send_notification(
-                bot=dialog_manager.event.bot,
-                user_id=trainer_id,
-                text=message,
-            )
+        await _invalidate_availability(dialog_manager, trainer_id)
 
-            schedule_task_id = (
-                f'{client_id}_'
-                f'{schedule.date.isoformat()}_'
-                f'{schedule.time}'
-            )
-            await schedule_source.delete_schedule(schedule_task_id)
+        workout: Workout = result[-1][WORKOUT]
 
-            logger.info(
-                'Задача об уведомлении id=%s отменена', schedule_task_id
-            )
         dialog_manager.start_data[WORKOUTS] = workout.workouts
         dialog_manager.dialog_data[SELECTED_DATES].pop(selected_date)
 
@@ -9,7 +9,7 @@ from sqlalchemy.exc import SQLAlchemyError
 from db import get_workouts, update_workouts, Workout
 from schemas import ClientSchema
 from states import ClientEditState
-from notification import send_notification
+from tasks import enqueue_notification
 
 
 logger = logging.getLogger(__name__)
@@ -134,7 +134,7 @@ async def workout_apply(
             f'Количество тренировок было изменено, '
             f'теперь у вас {workout_db_new.workouts} тренировок.'
         )
-        await send_notification(
+        await enqueue_notification(
             bot=dialog_manager.event.bot,
             user_id=client_id,
             text=text,
@@ -1,4 +1,3 @@
-import asyncio
 import logging
 
 from aiogram import Router, F
@@ -10,7 +9,7 @@ from aiogram_dialog import (
 )
 from sqlalchemy.exc import SQLAlchemyError
 
-from db import Client, get_user, Trainer
+from db import resolve_roles, UserRoles
 from schemas import ClientSchema, TrainerSchema
 from states import StartSG
 
@@ -32,20 +31,9 @@ async def command_start(
     user_id: int = dialog_manager.event.from_user.id
 
     try:
-        client: Client | None
-        trainer: Trainer | None
-
-        client, trainer = await asyncio.gather(
-            get_user(
-                dialog_manager=dialog_manager,
-                user_id=user_id,
-                model=Client,
-            ),
-            get_user(
-                dialog_manager=dialog_manager,
-                user_id=user_id,
-                model=Trainer,
-            )
+        roles: UserRoles = await resolve_roles(
+            dialog_manager=dialog_manager,
+            user_id=user_id,
         )
     except SQLAlchemyError as error:
         logger.error(
@@ -60,16 +48,14 @@ async def command_start(
         )
         return
 
-    for user in (client, trainer):
-        if user:
-            if isinstance(user, Client):
-                user_data.update(
-                    ClientSchema.model_validate(user.get_data()).model_dump(),
-                )
-            elif isinstance(user, Trainer):
-                user_data.update(
-                    TrainerSchema.model_validate(user.get_data()).model_dump(),
-                )
+    if roles.client:
+        user_data.update(
+            ClientSchema.model_validate(roles.client).model_dump(),
+        )
+    if roles.trainer:
+        user_data.update(
+            TrainerSchema.model_validate(roles.trainer).model_dump(),
+        )
 
     await dialog_manager.start(
         data=user_data,
@@ -15,7 +15,6 @@ from db import (
     get_frame_clients,
     get_work_days,
     get_workouts,
-    WorkingDay,
     Workout,
 )
 from schemas import ClientSchema, WorkDaySchema
@@ -24,11 +23,17 @@ from states import ClientEditState, TrainerState, TrainerScheduleStates
 
 logger = logging.getLogger(__name__)
 
+BACK = 'back'
+FIRST = 'first'
+FIRST_ID = 'first_id'
 GROUP = 'group'
+HAS_NEXT = 'has_next'
+HAS_PREV = 'has_prev'
 ID = 'id'
+LAST_ID = 'last_id'
+NEXT = 'next'
 WORKOUT = 'workout'
 WORKOUTS = 'workouts'
-OFFSET = 'offset'
 LIMIT = 'limit'
 RADIO_MESS = 'radio_mess'
 RADIO_GROUP = 'radio_pag'
@@ -148,36 +153,57 @@ async def get_client(
 
 async def _get_frame_group(
     dialog_manager: DialogManager,
-    limit: int
+    direction: Literal['first', 'next', 'back']
 ) -> list[dict]:
     """
     Обновляет отображаемый список клиентов в диалоговом окне с
-    учётом пагинации.
+    учётом keyset-пагинации.
+
+    Курсоры страницы (id первого и последнего клиента) и признаки
+    наличия соседних страниц хранятся в `dialog_manager.dialog_data`.
+    Переход вперёд с последней страницы возвращает к первой, переход
+    назад с первой страницы перечитывает первую страницу.
     """
 
     context: Context = dialog_manager.current_context()
     all: bool = context.widget_data.get(RADIO_GROUP) == '1'
 
-    offset: int = dialog_manager.dialog_data[OFFSET]
-    dialog_manager.dialog_data[OFFSET] += limit
+    data: dict = dialog_manager.dialog_data
 
-    if dialog_manager.dialog_data[OFFSET] < 0:
-        dialog_manager.dialog_data[OFFSET] = 0
+    cursor: int | None = None
+    backward: bool = False
 
-    try:
-        group: list[dict] = await get_frame_clients(
+    if direction == NEXT and data.get(HAS_NEXT):
+        cursor = data.get(LAST_ID)
+    elif direction == BACK and data.get(HAS_PREV):
+        cursor = data.get(FIRST_ID)
+        backward = True
+
+    group, has_more = await get_frame_clients(
+        dialog_manager=dialog_manager,
+        all=all,
+        cursor=cursor,
+        backward=backward,
+    )
+    if not group and cursor is not None:
+        cursor, backward = None, False
+        group, has_more = await get_frame_clients(
             dialog_manager=dialog_manager,
             all=all,
         )
-        if not group and dialog_manager.dialog_data[OFFSET] > 0:
-            dialog_manager.dialog_data[OFFSET] = 0
-            group: list[dict] = await get_frame_clients(
-                dialog_manager=dialog_manager,
-                all=all,
-            )
-    except SQLAlchemyError as error:
-        dialog_manager.dialog_data[OFFSET] = offset
-        raise error
+
+    if cursor is None:
+        data[HAS_PREV] = False
+        data[HAS_NEXT] = has_more
+    elif backward:
+        data[HAS_PREV] = has_more
+        data[HAS_NEXT] = True
+    else:
+        data[HAS_PREV] = True
+        data[HAS_NEXT] = has_more
+
+    data[FIRST_ID] = group[0][ID] if group else None
+    data[LAST_ID] = group[-1][ID] if group else None
 
     return group
 
@@ -225,7 +251,6 @@ async def set_frame(
 
     dialog_manager.dialog_data.update(
         {
-            OFFSET: 0,
             LIMIT: 5
         }
     )
@@ -233,7 +258,7 @@ async def set_frame(
     await _set_radio_group(dialog_manager)
 
     try:
-        group: list[dict] = await _get_frame_group(dialog_manager, 0)
+        group: list[dict] = await _get_frame_group(dialog_manager, FIRST)
     except SQLAlchemyError as error:
         logger.error(
             'Ошибка при загрузке списка клиентов Client '
@@ -265,10 +290,7 @@ async def next_page(
     Обрабатывает переход на следующую страницу списка клиентов.
     """
 
-    group: list[dict] = await _get_frame_group(
-        dialog_manager,
-        dialog_manager.dialog_data[LIMIT],
-    )
+    group: list[dict] = await _get_frame_group(dialog_manager, NEXT)
 
     return group
 
@@ -283,10 +305,7 @@ async def back_page(
     Обрабатывает переход на предыдущую страницу списка клиентов.
     """
 
-    group: list[dict] = await _get_frame_group(
-        dialog_manager,
-        -(dialog_manager.dialog_data[LIMIT]),
-    )
+    group: list[dict] = await _get_frame_group(dialog_manager, BACK)
 
     return group
 
@@ -388,7 +407,7 @@ async def to_schedule_dialog(
         _get_current_widget_context(dialog_manager, RADIO_WORK)
 
     try:
-        work_days: list[WorkingDay] | None = \
+        work_days: tuple[dict, ...] | None = \
             await get_work_days(dialog_manager)
     except SQLAlchemyError as error:
         logger.error(
@@ -410,12 +429,11 @@ async def to_schedule_dialog(
 
         for work_day in work_days:
             work_day_schema: WorkDaySchema = \
-                WorkDaySchema.model_validate(work_day.get_data())
+                WorkDaySchema.model_validate(work_day)
             item: str = work_day_schema.item  # '1' | '2' | '3'
-            work: str = work_day_schema.work  # '10,11,12,13,14,'
 
-            # SHEDULES = {'1': '10,11,12..', '2': '9,10,11..', '3': '12,13..'}
-            data[SCHEDULES][item] = work
+            # SHEDULES = {'1': 523776, '2': 1048064, '3': 2096640}
+            data[SCHEDULES][item] = int(work_day_schema.slots)
 
         # WIDGET_DATA = {'radio_work': '1' | '2' | '3'}
         data[WIDGET_DATA] = {RADIO_WORK: widget_item}
@@ -26,6 +26,7 @@ from .handlers import (
     CustomCalendar,
     CustomMultiselect,
     on_date_selected,
+    on_month_changed,
     process_selection,
     process_start,
     process_result,
@@ -86,6 +87,7 @@ trainer_schedule_dialog = Dialog(
         CustomCalendar(
             id='cal',
             on_click=on_date_selected,
+            on_month_changed=on_month_changed,
         ),
         RADIO,
         Row(
@@ -5,6 +5,8 @@ from aiogram_dialog.api.entities import Context
 from aiogram_dialog.widgets.kbd.select import ManagedMultiselect
 from typing import Any
 
+from slots import SlotMask
+
 
 logger = logging.getLogger(__name__)
 
@@ -24,18 +26,19 @@ TIME = 'time'
 TRAININGS = 'trainings'
 
 
-def format_schedule(work: str) -> str:
+def format_schedule(work: int | str) -> str:
     """
-    Форматирует строку с перечислением временных интервалов (часов) в
-    строку диапазона.
+    Форматирует набор часов рабочей смены в строку диапазона.
 
-    Принимает строку с числами, разделёнными запятыми (например, "11,13,15"),
+    Принимает маску часов (или строку старого формата "11,13,15")
     и возвращает строку в формате "минимум-максимум", например "11-15".
     """
 
-    items = sorted(map(int, work.split(',')))
+    slots = SlotMask.parse(work)
+    if not slots:
+        return 'не выбрано'
 
-    return f'{items[0]}-{items[-1]}'
+    return f'{slots.start}-{slots.stop}'
 
 
 async def selection_getter(
@@ -6,29 +6,16 @@ from aiogram_dialog.api.entities.context import Context
 from aiogram_dialog.api.internal import RawKeyboard
 from aiogram_dialog.widgets.kbd import (
     Button,
-    Calendar,
-    CalendarScope,
     ManagedCalendar,
     ManagedMultiselect,
     ManagedRadio,
     Multiselect,
     SwitchTo,
 )
-from aiogram_dialog.widgets.kbd.calendar_kbd import (
-    DATE_TEXT,
-    TODAY_TEXT,
-    CalendarDaysView,
-    CalendarMonthView,
-    CalendarScopeView,
-    CalendarYearsView,
-    CalendarUserConfig,
-)
-from aiogram_dialog.widgets.text import Format, Text
-from babel.dates import get_day_names, get_month_names
-from datetime import date, datetime
+from cache import AvailabilityCache
+from datetime import date
 from sqlalchemy.exc import SQLAlchemyError
 from typing import Callable, Literal, TypeVar
-from zoneinfo import ZoneInfo
 
 from db import (
     add_trainer_schedule,
@@ -36,16 +23,18 @@ from db import (
     get_trainer_schedules,
     cancel_training_db,
     Client,
+    Outbox,
     Schedule,
     TrainerSchedule,
     update_working_day,
     WorkingDay,
 )
 from schemas import SelectedDateSchema, WorkDaySchema
-from taskiq_broker import schedule_source
-from notification import send_notification
+from slots import SlotMask
 from states import TrainerScheduleStates
-from timezones import get_current_datetime
+from tasks import notification_event
+from timezones import get_today
+from widgets import ManagedWindowedCalendar, MarkedCalendar, month_window
 
 
 logger = logging.getLogger(__name__)
@@ -53,13 +42,15 @@ logger = logging.getLogger(__name__)
 T = TypeVar("T")
 TypeFactory = Callable[[str], T]
 
+AVAILABILITY_CACHE = 'availability_cache'
+CALENDAR = 'cal'
 CLIENT_ID = 'client_id'
 CLIENT_NAME = 'client_name'
 DATA = 'data'
 DATE = 'date'
 IS_WORK = 'is_work'
 RADIO_WORK = 'radio_work'
-SCHEDULE = 'schedule'
+SCHEDULE_MARK = '🔴'  # опубликованный день расписания
 SCHEDULES = 'schedules'
 SEL = 'sel'
 SEL_D = 'sel_d'
@@ -67,111 +58,38 @@ SELECTED_DATE = 'selected_date'
 SELECTED_DATES = 'selected_dates'
 TIME = 'time'
 TIME_ZONE = 'time_zone'
+TODAY_MARK = '⭕'
 TRAINER_ID = 'trainer_id'
 TRAININGS = 'trainings'
 WIDGET_DATA = 'widget_data'
+WORK_MARKS = ' 🟢🔵🟣'  # отметка выбранной даты по номеру смены
 WORKOUT = 'workout'
 WORKOUTS = 'workouts'
 
 
-class WeekDay(Text):
-
-    async def _render_text(self, data, dialog_manager: DialogManager) -> str:
-
-        selected_date: date = data[DATE]
-        locale = dialog_manager.event.from_user.language_code
-
-        return get_day_names(
-            width='short',
-            context='stand-alone',
-            locale=locale,
-        )[selected_date.weekday()].title()
-
-
-class MarkedDay(Text):
+class CustomCalendar(MarkedCalendar):
 
-    def __init__(self, mark: str, other: Text):
-
-        super().__init__()
-        self.mark = mark
-        self.other = other
-
-    async def _render_text(self, data, dialog_manager: DialogManager) -> str:
-
-        current_date: date = data[DATE]
-        serial_date = current_date.isoformat()
-        selected = dialog_manager.dialog_data.get(SELECTED_DATES, {})
-
-        if serial_date in selected:
-            if self.mark == '⭕':
-                return self.mark
-            radio_item = selected[serial_date]
-            if isinstance(radio_item, str):
-                return self.mark[int(radio_item)]
-            return '🔴'
-
-        return await self.other.render_text(data, dialog_manager)
-
-
-class Month(Text):
-
-    async def _render_text(self, data, dialog_manager: DialogManager) -> str:
-
-        selected_date: date = data[DATE]
-        locale = dialog_manager.event.from_user.language_code
-
-        return get_month_names(
-            'wide', context='stand-alone', locale=locale,
-        )[selected_date.month].title()
-
-
-class CustomCalendar(Calendar):
-
-    def _init_views(self) -> dict[CalendarScope, CalendarScopeView]:
-
-        return {
-            CalendarScope.DAYS: CalendarDaysView(
-                self._item_callback_data,
-                date_text=MarkedDay(" 🟢🔵🟣", DATE_TEXT),
-                today_text=MarkedDay("⭕", TODAY_TEXT),
-                header_text='~~~~~ ' + Month() + ' ~~~~~',
-                weekday_text=WeekDay(),
-                next_month_text=Month() + ' >>',
-                prev_month_text='<< ' + Month(),
-            ),
-            CalendarScope.MONTHS: CalendarMonthView(
-                self._item_callback_data,
-                month_text=Month(),
-                header_text='~~~~~ ' + Format('{date:%Y}') + ' ~~~~~',
-                this_month_text='[' + Month() + ']',
-            ),
-            CalendarScope.YEARS: CalendarYearsView(
-                self._item_callback_data,
-            ),
-        }
-
-    async def _get_user_config(
+    def _mark_days(
             self,
-            data: dict,
             manager: DialogManager,
-    ) -> CalendarUserConfig:
+            today: date,
+    ) -> dict[str, str]:
         """
-        User related config getter.
-
-        Override this method to customize how user config is retrieved.
-
-        :param data: data from window getter
-        :param manager: dialog manager instance
-        :return:
+        Отмечает опубликованные дни расписания и выбранные даты цветом
+        выбранной рабочей смены, сегодняшний день — отдельной отметкой.
         """
 
-        tz = ZoneInfo(manager.start_data.get(TIME_ZONE))
+        selected: dict = manager.dialog_data.get(SELECTED_DATES, {})
 
-        calendar_config = CalendarUserConfig(
-            timezone=tz
-        )
+        marks: dict[str, str] = {
+            date_: WORK_MARKS[int(data)] if isinstance(data, str)
+            else SCHEDULE_MARK
+            for date_, data in selected.items()
+        }
+        if today.isoformat() in marks:
+            marks[today.isoformat()] = TODAY_MARK
 
-        return calendar_config
+        return marks
 
 
 class CustomMultiselect(Multiselect):
@@ -196,23 +114,6 @@ class CustomMultiselect(Multiselect):
         return keyboard
 
 
-async def _cancel_schedule_task(
-    client_id: int,
-    date: str,
-    time: int
-) -> None:
-    """
-    Отменяет задачу уведомления, связанную с записью на тренировку.
-    """
-
-    schedule_task_id = f'{client_id}_{date}_{time}'
-
-    await schedule_source.delete_schedule(schedule_task_id)
-    logger.info(
-        'Задача об уведомлении id=%s отменена', schedule_task_id
-    )
-
-
 async def _set_radio_calendar(
     callback: CallbackQuery,
     widget: Button,
@@ -228,9 +129,34 @@ async def _set_radio_calendar(
 
     await radio.set_checked(widget_item)
 
+    return await _load_schedule_window(dialog_manager)
+
+
+async def _load_schedule_window(
+    dialog_manager: DialogManager,
+    offset: date | None = None,
+) -> bool:
+    """
+    Загружает расписание тренера в окне month_window вокруг месяца
+    offset (по умолчанию — отображаемого календарём) и отмечает окно в
+    календаре. Опубликованные дни вне окна удаляются из данных диалога,
+    выбранные, но ещё не сохранённые даты остаются.
+    """
+
+    calendar: ManagedWindowedCalendar = dialog_manager.find(CALENDAR)
+    if offset is None:
+        offset = calendar.get_offset() or get_today(
+            dialog_manager.start_data.get(TIME_ZONE)
+        )
+
+    date_from, date_to = month_window(offset)
+
     try:
-        schedules: list[TrainerSchedule] = \
-            await get_trainer_schedules(dialog_manager)
+        schedules: list[TrainerSchedule] = await get_trainer_schedules(
+            dialog_manager=dialog_manager,
+            date_from=date_from,
+            date_to=date_to,
+        )
     except SQLAlchemyError as error:
         logger.error(
             'Произошла ошибка при попытке получить расписание '
@@ -243,9 +169,14 @@ async def _set_radio_calendar(
 
     selected: dict = dialog_manager.dialog_data.setdefault(SELECTED_DATES, {})
 
+    for date_, data in list(selected.items()):
+        if not isinstance(data, str):
+            selected.pop(date_)
+
     for schedule in schedules:
         selected[schedule.date.isoformat()] =\
-            _transform_time(schedule.time)
+            _transform_time(SlotMask(schedule.slots))
+    calendar.set_window(offset)
 
     return True
 
@@ -288,29 +219,23 @@ def _get_current_widget_context(
         return default
 
 
-def _get_sorted_items(work: str) -> list[int]:
+def _transform_time(slots: SlotMask) -> dict[str, str]:
     """
-    Преобразует строку с числами, разделёнными запятыми,
-    в отсортированный список целых чисел.
+    Преобразует маску часов работы в словарь с началом, концом
+    рабочего дня и перечнем часов перерыва. Для пустой маски
+    начало и конец не определены и выводятся прочерком.
     """
 
-    return sorted(map(int, work.split(',')))
-
-
-def _transform_time(work_hours_str: str) -> dict[str, str]:
-    """
-    Преобразует строку с указанием часов работы в словарь с началом, концом
-    рабочего дня и перечнем часов перерыва.
-    """
+    if not slots:
+        return {'start': '-', 'stop': '-', 'breaks': 'нет'}
 
-    items: list[int] = sorted(map(int, work_hours_str.split(',')))
-    start, stop = items[0], items[-1]
-    break_list = [
-        str(item) for item in range(start, stop+1) if item not in items
-    ]
-    breaks = ','.join(break_list) or 'нет'
+    breaks = ','.join(map(str, slots.breaks)) or 'нет'
 
-    return {'start': str(start), 'stop': str(stop), 'breaks': breaks}
+    return {
+        'start': str(slots.start),
+        'stop': str(slots.stop),
+        'breaks': breaks,
+    }
 
 
 def _get_data_trainings(
@@ -333,6 +258,23 @@ def _get_data_trainings(
     return data_trainings
 
 
+async def on_month_changed(
+    callback: CallbackQuery,
+    widget: ManagedCalendar,
+    dialog_manager: DialogManager,
+    offset: date
+) -> None:
+    """
+    Загружает расписание тренера для окна нового месяца календаря.
+    """
+
+    if not await _load_schedule_window(dialog_manager, offset):
+        await callback.answer(
+            text='Не удалось получить ваше расписание, попробуйте еще раз',
+            show_alert=True,
+        )
+
+
 async def on_date_selected(
     callback: CallbackQuery,
     widget: ManagedCalendar,
@@ -348,15 +290,15 @@ async def on_date_selected(
     """
 
     timezone: str = dialog_manager.start_data.get(TIME_ZONE)
-    today: datetime = get_current_datetime(timezone)
+    today: date = get_today(timezone)
 
     serial_date = clicked_date.isoformat()
 
     selected: dict = dialog_manager.dialog_data.get(SELECTED_DATES, {})
 
-    _update_selected_dates(selected, today.date().isoformat())
+    _update_selected_dates(selected, today.isoformat())
 
-    if today.date() <= clicked_date:
+    if today <= clicked_date:
 
         if serial_date in selected:
 
@@ -403,7 +345,7 @@ async def on_date_selected(
                     TRAININGS: data_trainings
                 }
 
-                if today.date() == clicked_date:
+                if today == clicked_date:
                     await dialog_manager.switch_to(
                         state=TrainerScheduleStates.trainer_today,
                         show_mode=ShowMode.EDIT,
@@ -415,7 +357,7 @@ async def on_date_selected(
                     )
 
         else:
-            if today.date() == clicked_date:
+            if today == clicked_date:
                 return
 
             widget_item: Literal['1', '2', '3'] = \
@@ -478,10 +420,25 @@ async def update_selected_dates(
     """
 
     timezone: str = dialog_manager.start_data.get(TIME_ZONE)
-    today: datetime = get_current_datetime(timezone)
+    today: date = get_today(timezone)
 
     selected: dict = dialog_manager.dialog_data[SELECTED_DATES]
-    _update_selected_dates(selected, today.date().isoformat())
+    _update_selected_dates(selected, today.isoformat())
+
+
+async def _invalidate_availability(
+    dialog_manager: DialogManager,
+    trainer_id: int,
+) -> None:
+    """
+    Сбрасывает кэш доступности тренера после изменения расписания.
+    """
+
+    cache: AvailabilityCache | None = \
+        dialog_manager.middleware_data.get(AVAILABILITY_CACHE)
+
+    if cache is not None:
+        await cache.invalidate(trainer_id)
 
 
 async def cancel_training(
@@ -497,9 +454,9 @@ async def cancel_training(
     context: Context = dialog_manager.current_context()
 
     timezone: str = dialog_manager.start_data.get(TIME_ZONE)
-    today: datetime = get_current_datetime(timezone)
+    today: date = get_today(timezone)
 
-    if today.date().isoformat() >= \
+    if today.isoformat() >= \
             dialog_manager.dialog_data[SELECTED_DATE][DATE]:
 
         await update_selected_dates(
@@ -564,12 +521,22 @@ async def cancel_training(
 
         cancel_trainings: list[dict] = [trainings[int(item)] for item in items]
 
+        outbox: list[Outbox] = [
+            notification_event(
+                user_id=training[CLIENT_ID],
+                text=f'Ваше занятие в группе {trainer_id} '
+                     f'{selected_date} в {training[TIME]}:00 отменено.',
+            )
+            for training in cancel_trainings
+        ]
+
         try:
             canceled_trainings_db = await cancel_training_db(
                 dialog_manager=dialog_manager,
                 selected_date=selected_date,
                 trainer_id=trainer_id,
                 trainings=cancel_trainings,
+                outbox=outbox,
             )
         except SQLAlchemyError as error:
             logger.error(
@@ -587,23 +554,7 @@ async def cancel_training(
             return
 
         if canceled_trainings_db is not None:
-            for row in canceled_trainings_db:
-                schedule: Schedule = row[SCHEDULE]
-                text = (
-                    f'Ваше занятие в группе {trainer_id} '
-                    f'{selected_date} в '
-                    f'{schedule.time}:00 отменено.'
-                )
-                await send_notification(
-                    bot=dialog_manager.event.bot,
-                    user_id=schedule.client_id,
-                    text=text,
-                )
-                await _cancel_schedule_task(
-                    client_id=schedule.client_id,
-                    date=selected_date,
-                    time=schedule.time,
-                )
+            await _invalidate_availability(dialog_manager, trainer_id)
         else:
             logger.error(
                 'неудалось загрузить объекты для корректного '
@@ -667,7 +618,7 @@ async def cancel_work(
         )
         if result_calendar:
             dialog_manager.dialog_data.pop(SELECTED_DATE)
-            dialog_manager.dialog_data[SELECTED_DATES].pop(schedule_date)
+            dialog_manager.dialog_data[SELECTED_DATES].pop(schedule_date, None)
 
             await dialog_manager.switch_to(
                 state=TrainerScheduleStates.schedule,
@@ -692,20 +643,20 @@ async def apply_selected(
     """
 
     timezone: str = dialog_manager.start_data.get(TIME_ZONE)
-    today: datetime = get_current_datetime(timezone)
+    today: date = get_today(timezone)
 
     selected_dates: dict = dialog_manager.dialog_data.get(SELECTED_DATES)
 
     trainer_schedules: dict = {
         date_selected: data for date_selected, data in selected_dates.items()
-        if isinstance(data, str) and today.date().isoformat() < date_selected
+        if isinstance(data, str) and today.isoformat() < date_selected
     }  # {'2025-12-12': '1', '2025-12-13': '2', ...}
-    work_schedules: dict[str, str] = \
-        dialog_manager.start_data[SCHEDULES]  # {'1': '11,12,..', '2': '11,..}
+    work_schedules: dict[str, int] = \
+        dialog_manager.start_data[SCHEDULES]  # {'1': 7680, '2': 15872, ..}
 
     if trainer_schedules:
         try:
-            await add_trainer_schedule(
+            existing_dates: list[str] = await add_trainer_schedule(
                 dialog_manager=dialog_manager,
                 trainer_schedules=trainer_schedules,
                 work_schedules=work_schedules,
@@ -724,14 +675,35 @@ async def apply_selected(
             )
             return
 
+        await _invalidate_availability(
+            dialog_manager, dialog_manager.event.from_user.id
+        )
+
         for date_selected, work_item in trainer_schedules.items():
-            str_time: str = dialog_manager.start_data[SCHEDULES][work_item]
-            data: dict = _transform_time(str_time)
+            if date_selected in existing_dates:
+                continue
+            slots = SlotMask.parse(work_schedules[work_item])
+            data: dict = _transform_time(slots)
             dialog_manager.dialog_data[SELECTED_DATES][date_selected] = data
 
+        if existing_dates:
+            logger.info(
+                'Расписание тренера trainer_id=%s на даты %s уже '
+                'существовало, данные календаря перечитаны',
+                dialog_manager.event.from_user.id, existing_dates,
+            )
+            result: bool = await _set_radio_calendar(
+                callback=callback,
+                widget=widget,
+                dialog_manager=dialog_manager,
+            )
+            if not result:
+                for date_selected in existing_dates:
+                    selected_dates.pop(date_selected, None)
+
     _update_selected_dates(
         selected=selected_dates,
-        today=today.date().isoformat(),
+        today=today.isoformat(),
     )
 
 
@@ -809,12 +781,12 @@ async def _set_checked(dialog_manager: DialogManager, id: str) -> None:
     основе расписания.
     """
 
-    schedules: dict[Literal['1', '2', '3'], str] \
+    schedules: dict[Literal['1', '2', '3'], int] \
         = dialog_manager.start_data[SCHEDULES]
-    schedule: str = schedules[id]  # '10,11,12,13,14'
+    slots = SlotMask.parse(schedules[id])
     multiselect: CustomMultiselect = dialog_manager.find(SEL)
 
-    for item in _get_sorted_items(schedule):
+    for item in slots:
         await multiselect.set_checked(item, True)
 
 
@@ -830,19 +802,17 @@ async def process_selection(
     информацией о рабочем времени и перерывах.
     """
 
-    # schedules = {1: '10,11,12', 2: '11,12,13,14', 3: '9,10,11'}
-    str_times: dict[int, str] = dialog_manager.start_data[SCHEDULES]
+    # schedules = {'1': 7680, '2': 30720, '3': 3584}
+    schedules: dict[str, int] = dialog_manager.start_data[SCHEDULES]
 
-    work_times: list[int] = _get_sorted_items(str_times[item_id])
-    start_time = work_times[0]
-    end_time = work_times[-1]
+    slots = SlotMask.parse(schedules[item_id])
+    if not slots:
+        await callback.answer('Часы работы не выбраны.')
+        return
 
-    all_times = set(range(start_time, end_time))
-    breaks_set = all_times - set(work_times)
-    break_list = sorted(breaks_set)
-    breaks = ','.join(map(str, break_list)) if break_list else 'нет'
+    breaks = ','.join(map(str, slots.breaks)) or 'нет'
 
-    message = f'Рабочее время: {start_time}  {end_time-1}\n'\
+    message = f'Рабочее время: {slots.start}  {slots.stop-1}\n'\
         f'Перерыв: {breaks}'
 
     await callback.answer(message)
@@ -880,20 +850,24 @@ async def apply_work(
     context: Context = dialog_manager.current_context()
     times_list_raw: list[str] = context.widget_data.get(SEL, [])
 
-    times_list: list[int] = sorted(map(int, times_list_raw))
-
-    work = ','.join(map(str, times_list))
+    slots = SlotMask.from_hours(map(int, times_list_raw))
+    if not slots:
+        await callback.answer(
+            text='Часы работы не выбраны, отметьте хотя бы один час.',
+            show_alert=True,
+        )
+        return
 
     work_schema: WorkDaySchema = WorkDaySchema(
         item=widget_item,
-        work=work,
+        slots=slots,
     )
 
     try:
         work_day: WorkingDay | None = await update_working_day(
             dialog_manager=dialog_manager,
             item=work_schema.item,
-            value=work_schema.work,
+            value=work_schema.slots,
         )
     except SQLAlchemyError as error:
         logger.error(
@@ -916,7 +890,7 @@ async def apply_work(
 
     if work_day is not None:
         dialog_manager.start_data[SCHEDULES][work_schema.item] = \
-            work_schema.work
+            int(work_schema.slots)
 
     else:
         logger.error(
@@ -2,10 +2,10 @@ import logging
 
 from aiogram_dialog import DialogManager
 from datetime import datetime
+from functools import lru_cache
 from typing import Any
-from zoneinfo import ZoneInfo
 
-from timezones import timezones
+from timezones import get_clock, get_current_datetime, timezones
 
 
 CLIENT = 'is_client'
@@ -46,10 +46,19 @@ def format_current_time_with_tz(time_zone: str) -> str:
     «Area/City HH:MM».
     """
 
-    tz = ZoneInfo(time_zone)
-    now = datetime.now(tz)
+    now: datetime = get_current_datetime(time_zone)
 
-    return f'{time_zone} {now.strftime('%H:%M')}'
+    return f'{time_zone} {now:%H:%M}'
+
+
+@lru_cache(maxsize=1)
+def _timezone_labels(minute: int) -> list[tuple[str, str]]:
+    """
+    Подписи часовых поясов с местным временем. Результат кэшируется на
+    минуту: minute — номер текущей минуты, смена которого сбрасывает кэш.
+    """
+
+    return [(format_current_time_with_tz(tz), tz) for tz in timezones]
 
 
 async def get_data(
@@ -110,8 +119,7 @@ async def get_timezones(
 
     return {
         IS_CHECKED: is_checked,
-        RADIO_TZ: [
-            (format_current_time_with_tz(tz), tz)
-            for tz in timezones
-        ]
+        RADIO_TZ: _timezone_labels(
+            int(get_clock().now().timestamp()) // 60
+        ),
     }
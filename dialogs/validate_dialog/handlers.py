@@ -1,4 +1,3 @@
-import asyncio
 import logging
 
 from aiogram.types import CallbackQuery, Message
@@ -17,19 +16,22 @@ from db import (
     add_trainer,
     add_workout,
     Client,
+    gather_reads,
+    get_trainer_profile,
     get_trainers,
-    get_user,
     get_workouts,
     relation_exists_trainer_client,
+    resolve_roles,
     set_client,
     set_trainer,
     set_workout,
     Trainer,
+    UserRoles,
     Workout,
 )
-from notification import send_notification
 from schemas import ClientSchema, TrainerSchema
 from states import ClientState, StartSG, TrainerState
+from tasks import enqueue_notification
 
 
 logger = logging.getLogger(__name__)
@@ -80,7 +82,8 @@ async def to_client_dialog(
     """
 
     try:
-        trainers: list[Trainer] | None = await get_trainers(dialog_manager)
+        trainers: tuple[dict, ...] | None = \
+            await get_trainers(dialog_manager)
     except SQLAlchemyError as error:
         logger.error(
             'При попытке получить список Trainer связанных с '
@@ -119,8 +122,7 @@ async def to_client_dialog(
         )
 
     else:
-        dialog_manager.dialog_data[TRAINERS] = \
-            [trainer.get_data() for trainer in trainers]
+        dialog_manager.dialog_data[TRAINERS] = list(trainers)
 
         await dialog_manager.switch_to(
             state=StartSG.group,
@@ -285,12 +287,26 @@ async def client_is_valid(
     client_id = dialog_manager.event.from_user.id
     client_data = {}
 
+    roles: UserRoles
+    trainer_db: dict | None
+
     try:
-        relation_client_trainer: bool = \
-            await relation_exists_trainer_client(
-                dialog_manager=dialog_manager,
-                client_id=client_id,
-                trainer_id=trainer_id,
+        relation_client_trainer, trainer_db, roles = \
+            await gather_reads(
+                dialog_manager,
+                relation_exists_trainer_client(
+                    dialog_manager=dialog_manager,
+                    client_id=client_id,
+                    trainer_id=trainer_id,
+                ),
+                get_trainer_profile(
+                    dialog_manager=dialog_manager,
+                    trainer_id=trainer_id,
+                ),
+                resolve_roles(
+                    dialog_manager=dialog_manager,
+                    user_id=client_id,
+                ),
             )
         if relation_client_trainer:
             await message.answer(
@@ -316,29 +332,16 @@ async def client_is_valid(
             client_id=client_id,
         )
 
-        client_db: Client | None
-        trainer_db: Trainer | None
-
-        trainer_db, client_db = await asyncio.gather(
-            get_user(
-                dialog_manager=dialog_manager,
-                user_id=trainer_id,
-                model=Trainer,
-            ),
-            get_user(
-                dialog_manager=dialog_manager,
-                user_id=client_id,
-                model=Client,
-            )
-        )
-
         if trainer_db is None:
             await message.answer(
                 text='Неверный номер группы, попробуйте еще раз, пожалуйста!',
             )
             return
 
-        if client_db is None:
+        trainer_schema: TrainerSchema = \
+            TrainerSchema.model_validate(trainer_db)
+
+        if roles.client is None:
             client: Client = set_client(
                 id=client_schema.id,
                 name=client_schema.name,
@@ -346,15 +349,15 @@ async def client_is_valid(
 
             client_db: Client = await add_client(
                 dialog_manager=dialog_manager,
-                trainer=trainer_db,
+                trainer_id=trainer_schema.id,
                 client=client,
                 workout=workout,
             )
             client_data: dict = _set_client_data(
                 client_id=client_db.id,
                 client_name=client_db.name,
-                trainer_id=trainer_db.id,
-                time_zone=trainer_db.time_zone,
+                trainer_id=trainer_schema.id,
+                time_zone=trainer_schema.time_zone,
                 workouts=workout.workouts,
             )
 
@@ -366,8 +369,8 @@ async def client_is_valid(
             client_data: dict = _set_client_data(
                 client_id=client_schema.id,
                 client_name=client_schema.name,
-                trainer_id=trainer_db.id,
-                time_zone=trainer_db.time_zone,
+                trainer_id=trainer_schema.id,
+                time_zone=trainer_schema.time_zone,
                 workouts=workout.workouts,
             )
     except SQLAlchemyError as error:
@@ -384,7 +387,7 @@ async def client_is_valid(
         return
 
     text = f'Клиент {client_schema.name} присоединился к группе'
-    await send_notification(
+    await enqueue_notification(
         bot=dialog_manager.event.bot,
         user_id=trainer_id,
         text=text,
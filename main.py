@@ -7,14 +7,34 @@ from aiogram import Bot, Dispatcher, Router
 from aiogram.fsm.storage.redis import RedisStorage, DefaultKeyBuilder
 from aiogram.types import BotCommand
 from aiogram_dialog import setup_dialogs
+from cache import AvailabilityCache
 from logging import Logger
-from middleware import DbSessionMiddleware, LoggingMiddleware
+from middleware import (
+    DbSessionMiddleware,
+    LoggingMiddleware,
+    ReleaseSessionMiddleware,
+)
 from redis.asyncio import Redis
-from taskiq_broker import broker, schedule_source, scheduler
+from taskiq_broker import (
+    broker,
+    schedule_source,
+    scheduler,
+    SortedSetScheduleSource,
+)
 from taskiq_redis import RedisScheduleSource
 from taskiq.scheduler.scheduled_task import ScheduledTask
-
-from common import bot, engine, create_tables, Session
+from tasks import daily_reminder_schedules, send_scheduled_notification
+
+from common import (
+    bot,
+    config,
+    create_tables,
+    engine,
+    log_pool_metrics,
+    replica_engine,
+    ReplicaSession,
+    Session,
+)
 from logging_setting import logging_config
 
 
@@ -48,20 +68,38 @@ async def set_bot_commands(bot: Bot):
     await bot.set_my_commands(commands)
 
 
-async def set_delete_old_data(source: RedisScheduleSource) -> None:
+async def move_legacy_schedules(source: SortedSetScheduleSource) -> None:
+    """
+    Переносит задачи из прежнего RedisScheduleSource (ключи schedule:*)
+    в источник с индексом по времени запуска.
+    """
 
-    scheduled_tasks: list[ScheduledTask] = await source.get_schedules()
+    legacy = RedisScheduleSource(config.redis.url)
+    try:
+        moved: int = await source.import_schedules(legacy)
+    finally:
+        await legacy.shutdown()
 
-    for scheduled_task in scheduled_tasks:
-        if scheduled_task.task_name == 'clear_old_data':
-            await source.delete_schedule(scheduled_task.schedule_id)
-            logger.info(
-                'Задача очистки %s данных отменена', scheduled_task.task_name
-            )
+    if moved:
+        logger.info('Перенесено запланированных задач: %s', moved)
+
+
+async def set_delete_old_data(source: SortedSetScheduleSource) -> None:
+
+    scheduled_tasks: list[ScheduledTask] = \
+        await source.get_cron_schedules()
+
+    canceled: list[str] = [
+        scheduled_task.schedule_id for scheduled_task in scheduled_tasks
+        if scheduled_task.task_name == 'clear_old_data'
+    ]
+    await source.delete_schedules(canceled)
+    if canceled:
+        logger.info('Задачи очистки данных отменены: %s', canceled)
 
     cron = '0 3 * * 0'
 
-    await schedule_source.add_schedule(
+    await source.add_schedule(
         ScheduledTask(
             task_name='clear_old_data',
             labels={},
@@ -74,9 +112,38 @@ async def set_delete_old_data(source: RedisScheduleSource) -> None:
     logger.info('Периодическая очистка данных настроена на %s', cron)
 
 
-def setting_dispatcher(dispatcher: Dispatcher) -> None:
+async def set_daily_reminders(source: SortedSetScheduleSource) -> None:
+    """
+    Настраивает ежедневную рассылку напоминаний по часовым поясам и
+    удаляет напоминания, запланированные ранее для отдельных записей.
+    """
 
-    dispatcher.update.middleware(DbSessionMiddleware(Session))
+    legacy: list[ScheduledTask] = [
+        scheduled_task
+        for scheduled_task in await source.get_one_shot_schedules()
+        if scheduled_task.task_name == send_scheduled_notification.task_name
+    ]
+    await source.delete_schedules(
+        scheduled_task.schedule_id for scheduled_task in legacy
+    )
+    if legacy:
+        logger.info('Удалено напоминаний о записях: %s', len(legacy))
+
+    reminders: list[ScheduledTask] = daily_reminder_schedules()
+    for scheduled_task in reminders:
+        await source.add_schedule(scheduled_task)
+    logger.info(
+        'Ежедневные напоминания настроены для %s часовых поясов',
+        len(reminders),
+    )
+
+
+def setting_dispatcher(dispatcher: Dispatcher, bot: Bot) -> None:
+
+    dispatcher.update.middleware(
+        DbSessionMiddleware(Session, replica_pool=ReplicaSession)
+    )
+    bot.session.middleware(ReleaseSessionMiddleware())
 
     router: Router = dialogs.setup_all_dialogs(Router)
     # router.callback_query.middleware(LoggingMiddleware())
@@ -86,18 +153,19 @@ def setting_dispatcher(dispatcher: Dispatcher) -> None:
     setup_dialogs(dispatcher)
 
 
-redis = Redis(
-    host='redis',
-    port=6379,
-    db=0,
-    socket_connect_timeout=3
+redis = Redis.from_url(
+    config.redis.url,
+    socket_connect_timeout=3,
 )
 storage = RedisStorage(
     redis=redis,
     key_builder=DefaultKeyBuilder(with_destiny=True)
 )
-dp = Dispatcher(storage=storage)
-setting_dispatcher(dispatcher=dp)
+dp = Dispatcher(
+    storage=storage,
+    availability_cache=AvailabilityCache(redis),
+)
+setting_dispatcher(dispatcher=dp, bot=bot)
 
 
 async def main():
@@ -108,14 +176,39 @@ async def main():
     await create_tables(engine=engine)
     logger.info('База данных готова к работе')
 
+    await move_legacy_schedules(schedule_source)
     await set_delete_old_data(schedule_source)
+    await set_daily_reminders(schedule_source)
 
     await set_bot_commands(bot)
     await bot.delete_webhook(drop_pending_updates=True)
 
+    pool_metrics = asyncio.create_task(
+        log_pool_metrics(
+            engine=engine,
+            name='bot',
+            interval=config.bot_pool.METRICS_INTERVAL,
+        )
+    )
+
+    if replica_engine is not None:
+        replica_metrics = asyncio.create_task(
+            log_pool_metrics(
+                engine=replica_engine,
+                name='replica',
+                interval=config.bot_pool.METRICS_INTERVAL,
+            )
+        )
+
     await dp.start_polling(bot)
     logger.info('Бот остановлен')
 
+    pool_metrics.cancel()
+    await engine.dispose()
+    if replica_engine is not None:
+        replica_metrics.cancel()
+        await replica_engine.dispose()
+
     await scheduler.shutdown()
     logger.info('Планировщик остановлен')
     await broker.shutdown()
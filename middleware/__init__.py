@@ -1,5 +1,10 @@
 from .logging_middleware import LoggingMiddleware
-from .session import DbSessionMiddleware
+from .session import DbSessionMiddleware, LazySession, ReleaseSessionMiddleware
 
 
-__all__ = [LoggingMiddleware, DbSessionMiddleware]
+__all__ = [
+    LoggingMiddleware,
+    DbSessionMiddleware,
+    LazySession,
+    ReleaseSessionMiddleware,
+]
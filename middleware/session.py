@@ -1,17 +1,116 @@
-from aiogram import BaseMiddleware
-from aiogram.types import TelegramObject
-from sqlalchemy.ext.asyncio import async_sessionmaker
+import logging
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.methods import Response, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import TelegramObject, User
+from cachetools import TTLCache
+from contextvars import ContextVar
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from typing import Callable, Awaitable, Dict, Any
 
 
+logger = logging.getLogger(__name__)
+
+PIN_MAXSIZE = 10000
+PIN_TTL = 30  # сколько секунд после записи читать только с основного сервера
+STATS_EVERY = 1000  # период вывода статистики, количество апдейтов
+
+# Сессии апдейта, который обрабатывается в текущей задаче.
+_update_sessions: ContextVar[tuple['LazySession', ...]] = ContextVar(
+    'update_sessions', default=(),
+)
+
+
+class LazySession:
+    """
+    Ленивый прокси над AsyncSession.
+
+    Сессия создаётся при первом обращении к любому её атрибуту, поэтому
+    апдейты, не работающие с базой данных, не занимают соединение пула.
+    Метод release завершает транзакцию и возвращает соединение в пул,
+    не закрывая сессию, close закрывает сессию в конце апдейта.
+    """
+
+    def __init__(self, session_pool: async_sessionmaker):
+
+        self._session_pool = session_pool
+        self._session: AsyncSession | None = None
+        self.used: bool = False
+        self.committed: bool = False
+
+    def _get_session(self) -> AsyncSession:
+
+        if self._session is None:
+            self._session = self._session_pool()
+            self.used = True
+
+        return self._session
+
+    def __getattr__(self, name: str) -> Any:
+
+        return getattr(self._get_session(), name)
+
+    async def commit(self) -> None:
+
+        await self._get_session().commit()
+        self.committed = True
+
+    async def release(self) -> None:
+        """
+        Завершает открытую транзакцию и возвращает соединение в пул.
+
+        Сессия и загруженные объекты остаются доступны (expire_on_commit
+        выключен), следующий запрос начнёт новую транзакцию. Операции
+        записи фиксируют транзакцию сами, поэтому здесь завершаются
+        транзакции чтения; сессия с несохранёнными изменениями ORM
+        не трогается.
+        """
+
+        session: AsyncSession | None = self._session
+        if session is None or not session.in_transaction():
+            return
+        if session.new or session.dirty or session.deleted:
+            return
+
+        await session.commit()
+
+    async def close(self) -> None:
+        """
+        Закрывает сессию, если она была создана.
+        """
+
+        if self._session is not None:
+            session, self._session = self._session, None
+            await session.close()
+
+
 class DbSessionMiddleware(BaseMiddleware):
+    """
+    Передаёт в обработчики ленивую сессию основного сервера и, если
+    настроена реплика, сессию чтения.
+
+    После фиксации транзакции пользователь на PIN_TTL секунд
+    закрепляется за основным сервером, чтобы сразу видеть свои записи
+    независимо от отставания реплики.
+    """
+
     def __init__(
         self,
         session_pool: async_sessionmaker,
+        replica_pool: async_sessionmaker | None = None,
     ):
 
         super().__init__()
         self.session_pool = session_pool
+        self.replica_pool = replica_pool
+        self.pinned: TTLCache = TTLCache(maxsize=PIN_MAXSIZE, ttl=PIN_TTL)
+        self.updates: int = 0
+        self.updates_without_db: int = 0
 
     async def __call__(
         self,
@@ -20,6 +119,69 @@ class DbSessionMiddleware(BaseMiddleware):
         data: Dict[str, Any],
     ) -> Any:
 
-        async with self.session_pool() as session:
-            data['session'] = session
+        user: User | None = data.get('event_from_user')
+        use_replica: bool = (
+            self.replica_pool is not None
+            and (user is None or user.id not in self.pinned)
+        )
+
+        session = LazySession(self.session_pool)
+        data['session'] = session
+        data['session_pool'] = self.session_pool
+
+        read_session = LazySession(self.replica_pool) \
+            if use_replica else session
+        data['read_session'] = read_session
+        data['read_session_pool'] = self.replica_pool \
+            if use_replica else self.session_pool
+
+        token = _update_sessions.set(
+            (session,) if read_session is session
+            else (session, read_session)
+        )
+        try:
             return await handler(event, data)
+        finally:
+            _update_sessions.reset(token)
+            await session.close()
+            if read_session is not session:
+                await read_session.close()
+
+            if session.committed and user is not None:
+                self.pinned[user.id] = True
+
+            self._count(session.used or read_session.used)
+
+    def _count(self, used: bool) -> None:
+
+        self.updates += 1
+        if not used:
+            self.updates_without_db += 1
+
+        if self.updates % STATS_EVERY == 0:
+            logger.info(
+                'Апдейтов обработано: %s, без обращения к базе данных: '
+                '%s (%.1f%%)',
+                self.updates, self.updates_without_db,
+                100 * self.updates_without_db / self.updates,
+            )
+
+
+class ReleaseSessionMiddleware(BaseRequestMiddleware):
+    """
+    Перед каждым запросом к Bot API возвращает в пул соединения сессий
+    текущего апдейта, чтобы они не были заняты, пока обработчик ждёт
+    ответа Telegram. Вне обработки апдейта ничего не делает.
+    """
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+
+        for session in _update_sessions.get():
+            await session.release()
+
+        return await make_request(bot, method)
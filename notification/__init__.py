@@ -1,4 +1,11 @@
-from .notification import send_notification
+from .notification import send_notification, send_notifications
+from .scheduler import get_send_scheduler, SendScheduler, TokenBucket
 
 
-__all__ = [send_notification]
+__all__ = [
+    get_send_scheduler,
+    send_notification,
+    send_notifications,
+    SendScheduler,
+    TokenBucket,
+]
@@ -1,34 +1,29 @@
-import logging
-
 from aiogram import Bot
-from aiogram.exceptions import TelegramForbiddenError, TelegramBadRequest
-
+from typing import Iterable
 
-logger = logging.getLogger(__name__)
+from .scheduler import get_send_scheduler
 
 
 async def send_notification(
     bot: Bot,
     user_id: int,
     text: str
-) -> None:
+) -> bool:
     """
-    Отправляет текстовое сообщение пользователю через Telegram-бота.
+    Отправляет текстовое сообщение пользователю через Telegram-бота
+    с учётом ограничений частоты отправки.
     """
 
-    try:
-        await bot.send_message(
-            chat_id=user_id,
-            text=text,
-        )
-        logger.info(
-            'Сообщение пользователю user_id=%s, успешно отправленно.',
-            user_id,
-        )
+    return await get_send_scheduler(bot).send(chat_id=user_id, text=text)
+
+
+async def send_notifications(
+    bot: Bot,
+    messages: Iterable[tuple[int, str]],
+) -> list[bool]:
+    """
+    Отправляет пачку сообщений (user_id, text) параллельно, насколько
+    позволяют ограничения Telegram.
+    """
 
-    except (TelegramForbiddenError, TelegramBadRequest) as error:
-        logger.warning(
-            'Ошибка, сообщение пользователю user_id=%s не удалось отправить.',
-            user_id,
-            exc_info=error,
-        )
+    return await get_send_scheduler(bot).send_many(messages)
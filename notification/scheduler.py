@@ -0,0 +1,234 @@
+import asyncio
+import logging
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramRetryAfter,
+)
+from cachetools import TTLCache
+from time import monotonic
+from typing import Iterable
+
+
+logger = logging.getLogger(__name__)
+
+CHAT_BURST = 1
+CHAT_BUCKETS_MAXSIZE = 10000
+CHAT_BUCKETS_TTL = 60  # бакет чата без отправок забывается, секунды
+CHAT_RATE = 1.0  # сообщений в секунду в один чат
+FLOOD_CHATS = 2  # чатов с TelegramRetryAfter, означающих общий лимит бота
+FLOOD_WINDOW = 5  # за сколько секунд учитываются эти чаты
+MAX_CONCURRENCY = 10  # одновременных запросов sendMessage
+MAX_RETRIES = 3  # повторов после TelegramRetryAfter
+# Отправляют сообщения процесс бота (если очередь недоступна) и два
+# процесса taskiq worker (--workers 2), у каждого свой общий бакет.
+SENDER_PROCESSES = 3
+TELEGRAM_RATE = 30.0  # сообщений в секунду от бота всего
+GLOBAL_RATE = TELEGRAM_RATE / SENDER_PROCESSES  # на один процесс
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты: capacity токенов, пополняемых со скоростью
+    rate в секунду. Метод pause запрещает выдачу токенов на время,
+    указанное Telegram в retry_after.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens: float = capacity
+        self.updated: float = monotonic()
+        self.paused_until: float = 0.0
+
+    def _refill(self, now: float) -> None:
+
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self.updated) * self.rate,
+        )
+        self.updated = now
+
+    async def acquire(self) -> None:
+        """
+        Ждёт и забирает один токен.
+        """
+
+        while True:
+            now: float = monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+
+        self.paused_until = max(self.paused_until, monotonic() + seconds)
+        self.tokens = 0
+
+
+class SendScheduler:
+    """
+    Планировщик отправки сообщений Telegram.
+
+    Каждое сообщение забирает токен из бакета своего чата и из общего
+    бакета процесса и только после этого занимает место семафора,
+    ограничивающего число одновременных запросов, поэтому ожидание
+    одного чата не задерживает остальные.
+
+    Общий бакет действует в пределах процесса: лимит Telegram делится
+    между SENDER_PROCESSES процессами, отправляющими сообщения.
+
+    При TelegramRetryAfter приостанавливается бакет этого чата. Если за
+    FLOOD_WINDOW секунд ограничение получили FLOOD_CHATS разных чатов,
+    это общий лимит бота, и приостанавливается общий бакет. После паузы
+    сообщение отправляется повторно.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        global_rate: float = GLOBAL_RATE,
+        chat_rate: float = CHAT_RATE,
+        chat_burst: float = CHAT_BURST,
+        max_concurrency: int = MAX_CONCURRENCY,
+        max_retries: int = MAX_RETRIES,
+    ):
+
+        self.bot = bot
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chats: TTLCache = TTLCache(
+            maxsize=CHAT_BUCKETS_MAXSIZE,
+            ttl=CHAT_BUCKETS_TTL,
+        )
+        self._flood: TTLCache = TTLCache(
+            maxsize=CHAT_BUCKETS_MAXSIZE,
+            ttl=FLOOD_WINDOW,
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.sent: int = 0
+        self.failed: int = 0
+        self.retried: int = 0
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+
+        bucket: TokenBucket | None = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.chat_rate, self.chat_burst)
+        # Повторная запись продлевает срок жизни бакета.
+        self._chats[chat_id] = bucket
+
+        return bucket
+
+    def _retry_after(self, chat_id: int, seconds: float) -> None:
+        """
+        Приостанавливает отправку в чат, а при общем лимите бота —
+        все отправки процесса.
+        """
+
+        self._chat_bucket(chat_id).pause(seconds)
+
+        self._flood[chat_id] = True
+        self._flood.expire()
+        if len(self._flood) >= FLOOD_CHATS:
+            self._global.pause(seconds)
+
+    async def send(self, chat_id: int, text: str, **kwargs) -> bool:
+        """
+        Отправляет сообщение с учётом ограничений Telegram. Возвращает
+        False, если сообщение доставить не удалось.
+        """
+
+        for _ in range(self.max_retries + 1):
+            await self._chat_bucket(chat_id).acquire()
+            await self._global.acquire()
+
+            async with self._semaphore:
+                try:
+                    await self.bot.send_message(
+                        chat_id=chat_id,
+                        text=text,
+                        **kwargs,
+                    )
+                except TelegramRetryAfter as error:
+                    self.retried += 1
+                    self._retry_after(chat_id, error.retry_after)
+                    logger.warning(
+                        'Превышен лимит Telegram, отправка приостановлена '
+                        'на %s с, chat_id=%s',
+                        error.retry_after, chat_id,
+                    )
+                    continue
+                except (TelegramForbiddenError, TelegramBadRequest) as error:
+                    self.failed += 1
+                    logger.warning(
+                        'Ошибка, сообщение пользователю user_id=%s не '
+                        'удалось отправить.',
+                        chat_id,
+                        exc_info=error,
+                    )
+                    return False
+
+            self.sent += 1
+            logger.info(
+                'Сообщение пользователю user_id=%s, успешно отправленно.',
+                chat_id,
+            )
+            return True
+
+        self.failed += 1
+        logger.error(
+            'Сообщение пользователю user_id=%s не отправлено после %s '
+            'повторов',
+            chat_id, self.max_retries,
+        )
+
+        return False
+
+    async def send_many(
+        self,
+        messages: Iterable[tuple[int, str]],
+    ) -> list[bool]:
+        """
+        Отправляет сообщения (chat_id, text) параллельно в пределах
+        ограничений, сохраняя порядок отправки внутри каждого чата.
+        """
+
+        return list(await asyncio.gather(*(
+            self.send(chat_id, text) for chat_id, text in messages
+        )))
+
+    def stats(self) -> dict[str, int]:
+
+        return {
+            'sent': self.sent,
+            'failed': self.failed,
+            'retried': self.retried,
+        }
+
+
+_schedulers: dict[int, SendScheduler] = {}
+
+
+def get_send_scheduler(bot: Bot) -> SendScheduler:
+    """
+    Возвращает планировщик отправки бота, общий для процесса.
+    """
+
+    scheduler: SendScheduler | None = _schedulers.get(bot.id)
+    if scheduler is None:
+        scheduler = _schedulers[bot.id] = SendScheduler(bot)
+
+    return scheduler
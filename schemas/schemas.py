@@ -1,6 +1,8 @@
 from datetime import date
 from pydantic import BaseModel, ConfigDict, Field, model_validator
 
+from slots import SlotMask
+
 
 class UserSchema(BaseModel):
 
@@ -25,15 +27,14 @@ class TrainerSchema(UserSchema):
 class WorkDaySchema(BaseModel):
 
     item: str
-    work: str
+    slots: int
 
     @model_validator(mode='after')
-    def is_work(self):
-        for work_item in self.work.split(','):  # str
-            if work_item.isdigit() and -1 < int(work_item) < 24:
-                continue
-            raise ValueError('work is not valid')
-        return self
+    def is_slots(self):
+        if 0 < self.slots <= SlotMask.FULL:
+            self.slots = SlotMask(self.slots)
+            return self
+        raise ValueError('slots is not valid')
 
     @model_validator(mode='after')
     def is_item(self):
@@ -0,0 +1,4 @@
+from .slot_mask import HOURS, SlotMask
+
+
+__all__ = [HOURS, SlotMask]
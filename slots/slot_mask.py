@@ -0,0 +1,120 @@
+from typing import Iterable, Iterator
+
+
+HOURS = 24  # количество часовых слотов в сутках, бит i — час i
+
+
+class SlotMask(int):
+    """
+    Набор часовых слотов дня в виде 24-битной маски.
+
+    Бит i установлен, если час i входит в набор. Значение хранится в
+    целочисленных колонках TrainerSchedule.slots и WorkingDay.slots и
+    в данных диалогов, поэтому строки вида '9,10,11' больше не
+    разбираются при каждой отрисовке.
+    """
+
+    FULL = (1 << HOURS) - 1
+
+    def __new__(cls, value: int = 0) -> 'SlotMask':
+
+        if not 0 <= value <= cls.FULL:
+            raise ValueError(f'slot mask out of range: {value}')
+
+        return super().__new__(cls, value)
+
+    @classmethod
+    def from_hours(cls, hours: Iterable[int]) -> 'SlotMask':
+
+        value = 0
+        for hour in hours:
+            if not 0 <= hour < HOURS:
+                raise ValueError(f'hour out of range: {hour}')
+            value |= 1 << hour
+
+        return cls(value)
+
+    @classmethod
+    def parse(cls, value: 'int | str') -> 'SlotMask':
+        """
+        Приводит к маске число или строку старого формата '9,10,11'
+        (такие значения могут оставаться в сохранённых данных диалогов).
+        """
+
+        if isinstance(value, str):
+            return cls.from_hours(
+                int(item) for item in value.split(',') if item.strip()
+            )
+
+        return cls(value)
+
+    @staticmethod
+    def bit(hour: int) -> int:
+
+        return 1 << hour
+
+    @property
+    def hours(self) -> list[int]:
+        """
+        Часы набора по возрастанию.
+        """
+
+        return list(self)
+
+    @property
+    def start(self) -> int | None:
+        """
+        Первый час набора.
+        """
+
+        return (self & -self).bit_length() - 1 if self else None
+
+    @property
+    def stop(self) -> int | None:
+        """
+        Последний час набора.
+        """
+
+        return self.bit_length() - 1 if self else None
+
+    @property
+    def breaks(self) -> list[int]:
+        """
+        Часы между первым и последним, не входящие в набор.
+        """
+
+        if not self:
+            return []
+
+        return [
+            hour for hour in range(self.start, self.stop)
+            if not self >> hour & 1
+        ]
+
+    def __iter__(self) -> Iterator[int]:
+
+        value = int(self)
+        while value:
+            low = value & -value
+            yield low.bit_length() - 1
+            value ^= low
+
+    def __len__(self) -> int:
+
+        return self.bit_count()
+
+    def __contains__(self, hour: int) -> bool:
+
+        return 0 <= hour < HOURS and bool(self >> hour & 1)
+
+    def __repr__(self) -> str:
+
+        return f'SlotMask({self.hours})'
+
+    def __str__(self) -> str:
+
+        return int.__repr__(self)
+
+    def to_str(self) -> str:
+
+        return ','.join(map(str, self))
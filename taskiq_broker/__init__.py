@@ -1,4 +1,5 @@
 from .broker import broker, scheduler, schedule_source
+from .schedule_source import SortedSetScheduleSource
 
 
-__all__ = [broker, scheduler, schedule_source]
+__all__ = [broker, scheduler, schedule_source, SortedSetScheduleSource]
@@ -1,8 +1,12 @@
 from nats.js.api import RetentionPolicy, StreamConfig
-from taskiq import TaskiqScheduler
-from taskiq_redis import RedisScheduleSource
+from taskiq import SimpleRetryMiddleware, TaskiqScheduler
 from taskiq_nats import PullBasedJetStreamBroker
 
+from .schedule_source import SortedSetScheduleSource
+from config import load_config, Config
+
+
+config: Config = load_config()
 
 stream_config = StreamConfig(
     name='tg_bot_stream',
@@ -13,9 +17,12 @@ broker = PullBasedJetStreamBroker(
     servers="nats://nats:4222",
     queue='taskiq_queue',
     stream_config=stream_config,
-    )
+).with_middlewares(
+    # Повторяет только задачи с меткой retry_on_error=True.
+    SimpleRetryMiddleware(default_retry_count=3),
+)
 
-schedule_source = RedisScheduleSource("redis://redis:6379/0")
+schedule_source = SortedSetScheduleSource(config.redis.url)
 
 scheduler = TaskiqScheduler(
     broker=broker,
@@ -0,0 +1,224 @@
+from datetime import datetime, timezone
+from redis.asyncio import Redis
+from taskiq import ScheduleSource
+from taskiq.scheduler.scheduled_task import ScheduledTask
+from time import time
+from typing import Iterable
+
+
+BATCH_SIZE = 500  # задач, забираемых одним вызовом скрипта
+INTERVAL = 60  # такт taskiq scheduler без --update-interval, секунды
+MARGIN = 5  # запас горизонта выборки сверх такта, секунды
+PREFIX = 'schedules'
+
+# Забирает до ARGV[2] задач со временем запуска раньше ARGV[1] и
+# переносит каждую на ARGV[3] секунд после её времени запуска, но не
+# раньше ARGV[1], чтобы повторный вызов не выдал её снова. Задача,
+# которую планировщик не отправил (она попала за его следующий такт
+# или планировщик упал), будет выдана снова на следующем такте.
+# Индексы без данных задачи удаляются.
+_CLAIM_DUE = '''
+local due = redis.call(
+    'ZRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[1],
+    'WITHSCORES', 'LIMIT', 0, ARGV[2]
+)
+if #due == 0 then
+    return {}
+end
+local ids = {}
+for i = 1, #due, 2 do
+    ids[#ids + 1] = due[i]
+end
+local payloads = redis.call('HMGET', KEYS[2], unpack(ids))
+local claimed = {}
+for i, id in ipairs(ids) do
+    if payloads[i] then
+        local score = math.max(
+            tonumber(due[2 * i]) + tonumber(ARGV[3]), tonumber(ARGV[1])
+        )
+        redis.call('ZADD', KEYS[1], score, id)
+        claimed[#claimed + 1] = payloads[i]
+    else
+        redis.call('ZREM', KEYS[1], id)
+    end
+end
+return claimed
+'''
+
+# Удаляет задачи ARGV из хешей разовых и периодических задач и из
+# индекса времени запуска, возвращает id, которых не было ни в одном
+# из хешей.
+_DELETE_MANY = '''
+local missing = {}
+for _, id in ipairs(ARGV) do
+    local removed = redis.call('HDEL', KEYS[1], id)
+        + redis.call('HDEL', KEYS[3], id)
+    redis.call('ZREM', KEYS[2], id)
+    if removed == 0 then
+        missing[#missing + 1] = id
+    end
+end
+return missing
+'''
+
+
+def _timestamp(moment: datetime) -> float:
+
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+
+    return moment.timestamp()
+
+
+class SortedSetScheduleSource(ScheduleSource):
+    """
+    Источник расписаний taskiq в Redis с индексом по времени запуска.
+
+    Разовые задачи хранятся в хеше {prefix}:tasks, время их запуска — в
+    отсортированном множестве {prefix}:due, поэтому планировщик на
+    каждом такте забирает только наступающие задачи за O(log n) вместо
+    чтения всех расписаний. Периодические задачи (cron) хранятся
+    отдельно в хеше {prefix}:cron и выдаются на каждом такте. Отправленные
+    разовые задачи удаляются в post_send.
+
+    interval — такт планировщика (--update-interval, по умолчанию
+    минута). Горизонт выборки равен interval + margin, поэтому задачи,
+    наступающие до следующего такта, не пропускаются. Выданная, но не
+    отправленная задача выдаётся снова через interval после её времени
+    запуска.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        prefix: str = PREFIX,
+        batch_size: int = BATCH_SIZE,
+        interval: float = INTERVAL,
+        margin: float = MARGIN,
+    ):
+
+        self.redis = Redis.from_url(url)
+        self.batch_size = batch_size
+        self.interval = interval
+        self.lookahead = interval + margin
+        self.tasks_key = f'{prefix}:tasks'
+        self.due_key = f'{prefix}:due'
+        self.cron_key = f'{prefix}:cron'
+        self._claim_due = self.redis.register_script(_CLAIM_DUE)
+        self._delete_many = self.redis.register_script(_DELETE_MANY)
+
+    async def add_schedule(self, schedule: ScheduledTask) -> None:
+        """
+        Добавляет или заменяет задачу с тем же schedule_id.
+        """
+
+        data: str = schedule.model_dump_json()
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if schedule.time is not None:
+                pipe.hset(self.tasks_key, schedule.schedule_id, data)
+                pipe.zadd(
+                    self.due_key,
+                    {schedule.schedule_id: _timestamp(schedule.time)},
+                )
+                pipe.hdel(self.cron_key, schedule.schedule_id)
+            else:
+                pipe.hset(self.cron_key, schedule.schedule_id, data)
+                pipe.hdel(self.tasks_key, schedule.schedule_id)
+                pipe.zrem(self.due_key, schedule.schedule_id)
+            await pipe.execute()
+
+    async def delete_schedule(self, schedule_id: str) -> None:
+
+        await self.delete_schedules([schedule_id])
+
+    async def delete_schedules(self, schedule_ids: Iterable[str]) -> list[str]:
+        """
+        Удаляет задачи по id порциями по batch_size за один вызов
+        скрипта на порцию. Возвращает id, которых не было в источнике.
+        """
+
+        ids: list[str] = list(schedule_ids)
+        missing: list[str] = []
+        for start in range(0, len(ids), self.batch_size):
+            missing.extend(
+                schedule_id.decode()
+                for schedule_id in await self._delete_many(
+                    keys=[self.tasks_key, self.due_key, self.cron_key],
+                    args=ids[start:start + self.batch_size],
+                )
+            )
+
+        return missing
+
+    async def get_cron_schedules(self) -> list[ScheduledTask]:
+        """
+        Возвращает периодические задачи.
+        """
+
+        payloads: list[bytes] = await self.redis.hvals(self.cron_key)
+
+        return [
+            ScheduledTask.model_validate_json(payload)
+            for payload in payloads
+        ]
+
+    async def get_one_shot_schedules(self) -> list[ScheduledTask]:
+        """
+        Возвращает все разовые задачи, не изменяя их время запуска.
+        """
+
+        payloads: list[bytes] = await self.redis.hvals(self.tasks_key)
+
+        return [
+            ScheduledTask.model_validate_json(payload)
+            for payload in payloads
+        ]
+
+    async def get_schedules(self) -> list[ScheduledTask]:
+        """
+        Возвращает периодические задачи и разовые задачи, время запуска
+        которых наступит до следующего такта с запасом margin.
+        """
+
+        schedules: list[ScheduledTask] = await self.get_cron_schedules()
+
+        now: float = time()
+        while True:
+            payloads: list[bytes] = await self._claim_due(
+                keys=[self.due_key, self.tasks_key],
+                args=[now + self.lookahead, self.batch_size, self.interval],
+            )
+            schedules.extend(
+                ScheduledTask.model_validate_json(payload)
+                for payload in payloads
+            )
+            if len(payloads) < self.batch_size:
+                break
+
+        return schedules
+
+    async def import_schedules(self, source: ScheduleSource) -> int:
+        """
+        Переносит все задачи из другого источника и удаляет их там.
+        Возвращает количество перенесённых задач.
+        """
+
+        schedules: list[ScheduledTask] = await source.get_schedules()
+        for schedule in schedules:
+            await self.add_schedule(schedule)
+            await source.delete_schedule(schedule.schedule_id)
+
+        return len(schedules)
+
+    async def post_send(self, task: ScheduledTask) -> None:
+        """
+        Удаляет отправленную разовую задачу.
+        """
+
+        if task.time is not None:
+            await self.delete_schedule(task.schedule_id)
+
+    async def shutdown(self) -> None:
+
+        await self.redis.aclose()
@@ -1,5 +1,60 @@
+import asyncio
+
+from redis.asyncio import Redis
+from taskiq import TaskiqEvents, TaskiqState
+
 from .broker import broker, scheduler
-from common import bot, Session
+from common import (
+    bot,
+    config,
+    create_async_sessionmaker,
+    create_engine,
+    log_pool_metrics,
+)
+from tasks import run_outbox_relay
+
+
+# Воркер работает со своим пулом соединений, размер которого
+# задаётся профилем WORKER_DB_ независимо от пула бота.
+worker_engine = create_engine(
+    config,
+    pool=config.worker_pool,
+    application_name='worker',
+)
+Session = create_async_sessionmaker(worker_engine)
+redis = Redis.from_url(
+    config.redis.url,
+    socket_connect_timeout=3,
+)
+
+broker.add_dependency_context(
+    {'bot': bot, 'redis': redis, 'session': Session}
+)
+
+
+@broker.on_event(TaskiqEvents.WORKER_STARTUP)
+async def start_pool_metrics(state: TaskiqState) -> None:
+
+    state.pool_metrics = asyncio.create_task(
+        log_pool_metrics(
+            engine=worker_engine,
+            name='worker',
+            interval=config.worker_pool.METRICS_INTERVAL,
+        )
+    )
+
+
+@broker.on_event(TaskiqEvents.WORKER_STARTUP)
+async def start_outbox_relay(state: TaskiqState) -> None:
+
+    state.outbox_relay = asyncio.create_task(run_outbox_relay(Session))
+
+
+@broker.on_event(TaskiqEvents.WORKER_SHUTDOWN)
+async def stop_pool_metrics(state: TaskiqState) -> None:
 
+    state.outbox_relay.cancel()
+    state.pool_metrics.cancel()
+    await redis.aclose()
+    await worker_engine.dispose()
 
-broker.add_dependency_context({'bot': bot, 'session': Session})
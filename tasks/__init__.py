@@ -1,10 +1,27 @@
+from .outbox import (
+    notification_event,
+    relay_outbox,
+    run_outbox_relay,
+)
+from .reminders import daily_reminder_schedules, send_daily_reminders
 from .tasks import (
     clear_old_data,
+    enqueue_notification,
+    enqueue_notifications,
+    send_notification_task,
     send_scheduled_notification,
 )
 
 
 __all__ = [
     clear_old_data,
+    daily_reminder_schedules,
+    enqueue_notification,
+    enqueue_notifications,
+    notification_event,
+    relay_outbox,
+    run_outbox_relay,
+    send_daily_reminders,
+    send_notification_task,
     send_scheduled_notification,
 ]
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+
+from redis.exceptions import RedisError
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from taskiq.exceptions import SendTaskError
+
+from db import Outbox, set_outbox
+from taskiq_broker import schedule_source
+from .tasks import send_notification_task
+
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100  # событий за одну транзакцию ретранслятора
+LOCK_ID = 7204532  # advisory-блокировка ретранслятора outbox
+NOTIFICATION = 'notification'
+POLL_INTERVAL = 1.0  # пауза при пустой очереди, секунды
+PUBLISH_TIMEOUT = 5.0  # ожидание публикации одного события, секунды
+# События напоминаний, которые писались до ежедневной рассылки.
+REMINDER_ADD = 'reminder.add'
+REMINDER_DELETE = 'reminder.delete'
+KINDS = (NOTIFICATION, REMINDER_ADD, REMINDER_DELETE)
+
+
+def notification_event(user_id: int, text: str) -> Outbox:
+    """
+    Событие отправки уведомления пользователю.
+    """
+
+    return set_outbox(
+        kind=NOTIFICATION,
+        payload={'user_id': user_id, 'text': text},
+    )
+
+
+async def _publish(event: Outbox) -> None:
+    """
+    Публикует событие. Уведомление отправляется один раз по id
+    события, поэтому повторная публикация не меняет результат.
+
+    Напоминания о записях теперь отправляет ежедневная рассылка:
+    событие reminder.add считается обработанным, по reminder.delete
+    удаляется напоминание, запланированное прежней версией.
+    """
+
+    payload: dict = event.payload
+
+    if event.kind == NOTIFICATION:
+        await send_notification_task.kiq(
+            user_id=payload['user_id'],
+            text=payload['text'],
+            event_id=event.id,
+        )
+    elif event.kind == REMINDER_DELETE:
+        await schedule_source.delete_schedule(payload['schedule_id'])
+    elif event.kind == REMINDER_ADD:
+        logger.info(
+            'Событие outbox id=%s kind=%s устарело: напоминания '
+            'отправляет ежедневная рассылка',
+            event.id, event.kind,
+        )
+
+
+async def _try_publish(event: Outbox) -> bool:
+    """
+    Публикует событие не дольше PUBLISH_TIMEOUT секунд. Возвращает
+    False, если событие не опубликовано.
+    """
+
+    try:
+        await asyncio.wait_for(_publish(event), PUBLISH_TIMEOUT)
+    except (SendTaskError, RedisError, TimeoutError) as error:
+        logger.error(
+            'Не удалось опубликовать событие outbox id=%s kind=%s',
+            event.id, event.kind,
+            exc_info=error,
+        )
+        return False
+
+    return True
+
+
+async def relay_outbox(
+    session_pool: async_sessionmaker,
+    batch_size: int = BATCH_SIZE
+) -> int:
+    """
+    Публикует порцию событий outbox в порядке их записи и удаляет
+    опубликованные. Возвращает количество опубликованных событий.
+
+    Порцию обрабатывает один процесс под advisory-блокировкой. События
+    порции публикуются одновременно, каждое не дольше PUBLISH_TIMEOUT
+    секунд, поэтому медленный брокер не держит транзакцию открытой
+    дольше idle_in_transaction_session_timeout. Неопубликованные
+    события остаются в таблице до следующего запуска. События
+    неизвестных типов не выбираются и остаются в таблице.
+    """
+
+    async with session_pool() as session:
+        locked: bool = await session.scalar(
+            select(func.pg_try_advisory_xact_lock(LOCK_ID))
+        )
+        if not locked:
+            return 0
+
+        events: list[Outbox] = list(await session.scalars(
+            select(Outbox)
+            .where(Outbox.kind.in_(KINDS))
+            .order_by(Outbox.id)
+            .limit(batch_size)
+        ))
+
+        results: list[bool] = await asyncio.gather(
+            *(_try_publish(event) for event in events)
+        )
+        published: list[int] = [
+            event.id for event, result in zip(events, results) if result
+        ]
+
+        if published:
+            await session.execute(
+                delete(Outbox).where(Outbox.id.in_(published))
+            )
+        await session.commit()
+
+    return len(published)
+
+
+async def _log_unknown_events(session_pool: async_sessionmaker) -> None:
+
+    async with session_pool() as session:
+        unknown: int = await session.scalar(
+            select(func.count())
+            .select_from(Outbox)
+            .where(Outbox.kind.not_in(KINDS))
+        )
+
+    if unknown:
+        logger.warning(
+            'В outbox %s событий неизвестных типов, они не публикуются',
+            unknown,
+        )
+
+
+async def run_outbox_relay(
+    session_pool: async_sessionmaker,
+    interval: float = POLL_INTERVAL
+) -> None:
+    """
+    Непрерывно разбирает outbox: полные порции публикуются без паузы,
+    после неполной ретранслятор ждёт interval секунд.
+    """
+
+    try:
+        await _log_unknown_events(session_pool)
+    except SQLAlchemyError as error:
+        logger.error('Ошибка чтения outbox', exc_info=error)
+
+    while True:
+        try:
+            published: int = await relay_outbox(session_pool)
+        except SQLAlchemyError as error:
+            logger.error('Ошибка чтения outbox', exc_info=error)
+            published = 0
+
+        if published:
+            logger.info('Опубликовано событий outbox: %s', published)
+        if published < BATCH_SIZE:
+            await asyncio.sleep(interval)
@@ -0,0 +1,109 @@
+import asyncio
+import logging
+
+from dataclasses import dataclass
+from datetime import date
+from sqlalchemy import delete, literal_column, select, Table
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from time import monotonic
+
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 5000  # количество строк, удаляемых за одну транзакцию
+CHUNK_PAUSE = 0.05  # пауза между порциями, секунды
+
+
+@dataclass
+class PurgeReport:
+    """
+    Итог очистки одной таблицы.
+    """
+
+    table: str
+    deleted: int = 0
+    chunks: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """
+        Скорость удаления, строк в секунду.
+        """
+
+        return self.deleted / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict:
+
+        return {
+            'table': self.table,
+            'deleted': self.deleted,
+            'chunks': self.chunks,
+            'elapsed': round(self.elapsed, 3),
+            'rate': round(self.rate, 1),
+        }
+
+
+async def purge_table(
+    session_pool: async_sessionmaker,
+    table: Table,
+    cutoff: date,
+    chunk_size: int = CHUNK_SIZE,
+    pause: float = CHUNK_PAUSE,
+) -> PurgeReport:
+    """
+    Удаляет строки таблицы с датой меньше cutoff порциями по chunk_size.
+
+    Каждая порция удаляется выражением DELETE ... WHERE ctid IN
+    (SELECT ctid ... LIMIT n) и фиксируется отдельной транзакцией,
+    поэтому блокировки держатся недолго, а прерванная очистка при
+    повторном запуске с тем же cutoff продолжается с оставшихся строк.
+    """
+
+    ctid = literal_column('ctid')
+    stmt = delete(table).where(
+        ctid.in_(
+            select(ctid)
+            .select_from(table)
+            .where(table.c.date < cutoff)
+            .limit(chunk_size)
+            .scalar_subquery()
+        )
+    )
+
+    report = PurgeReport(table=table.name)
+    started: float = monotonic()
+
+    while True:
+        async with session_pool() as session:
+            result = await session.execute(stmt)
+            await session.commit()
+
+        deleted: int = result.rowcount
+        if not deleted:
+            break
+
+        report.deleted += deleted
+        report.chunks += 1
+        report.elapsed = monotonic() - started
+
+        logger.debug(
+            'Таблица %s: удалено %s строк (всего %s, %.1f строк/с)',
+            report.table, deleted, report.deleted, report.rate,
+        )
+
+        if deleted < chunk_size:
+            break
+
+        await asyncio.sleep(pause)
+
+    report.elapsed = monotonic() - started
+
+    logger.info(
+        'Таблица %s очищена до %s: удалено %s строк за %s порций, '
+        '%.3f с, %.1f строк/с',
+        report.table, cutoff.isoformat(), report.deleted,
+        report.chunks, report.elapsed, report.rate,
+    )
+
+    return report
@@ -0,0 +1,89 @@
+import logging
+
+from aiogram import Bot
+from datetime import date, timedelta
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from taskiq import Context, TaskiqDepends
+from taskiq.scheduler.scheduled_task import ScheduledTask
+from typing import Annotated
+
+from db import Schedule, Trainer
+from notification import send_notifications
+from taskiq_broker import broker
+from timezones import get_today, timezones
+
+
+logger = logging.getLogger(__name__)
+
+REMINDER_CRON = '0 11 * * *'  # местное время рассылки напоминаний
+
+
+@broker.task(task_name='send_daily_reminders')
+async def send_daily_reminders(
+    timezone: str,
+    context: Annotated[Context, TaskiqDepends()]
+) -> int:
+    """
+    Напоминает клиентам о завтрашних тренировках у тренеров с часовым
+    поясом timezone. Записи выбираются одним запросом по индексу даты,
+    сообщения отправляются пачкой с учётом ограничений Telegram.
+    Возвращает количество доставленных напоминаний.
+    """
+
+    bot: Bot = context.broker.custom_dependency_context.get('bot')
+    session_pool: async_sessionmaker = \
+        context.broker.custom_dependency_context.get('session')
+
+    tomorrow: date = get_today(timezone) + timedelta(days=1)
+
+    async with session_pool() as session:
+        result = await session.execute(
+            select(Schedule.client_id, Schedule.time)
+            .join(Trainer, Trainer.id == Schedule.trainer_id)
+            .where(
+                Schedule.date == tomorrow,
+                Trainer.time_zone == timezone,
+            )
+            .order_by(Schedule.time)
+        )
+        rows = result.all()
+
+    delivered: list[bool] = await send_notifications(
+        bot=bot,
+        messages=[
+            (
+                row.client_id,
+                f'Напоминание о тренировке '
+                f'{tomorrow.isoformat()} в {row.time}:00',
+            )
+            for row in rows
+        ],
+    )
+
+    logger.info(
+        'Напоминания на %s (%s): отправлено %s из %s',
+        tomorrow.isoformat(), timezone, sum(delivered), len(rows),
+    )
+
+    return sum(delivered)
+
+
+def daily_reminder_schedules() -> list[ScheduledTask]:
+    """
+    Периодические задачи рассылки напоминаний: по одной на каждый
+    часовой пояс, в REMINDER_CRON по местному времени.
+    """
+
+    return [
+        ScheduledTask(
+            task_name=send_daily_reminders.task_name,
+            labels={},
+            args=[],
+            kwargs={'timezone': timezone},
+            schedule_id=f'daily_reminders_{timezone}',
+            cron=REMINDER_CRON,
+            cron_offset=timezone,
+        )
+        for timezone in timezones
+    ]
@@ -1,20 +1,25 @@
+import asyncio
 import logging
 
 from aiogram import Bot
-from aiogram.exceptions import TelegramForbiddenError
-from datetime import datetime
-from sqlalchemy import select
+from datetime import date
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import async_sessionmaker
 from taskiq import Context, TaskiqDepends
-from typing import Annotated
-from zoneinfo import ZoneInfo
+from taskiq.exceptions import SendTaskError
+from typing import Annotated, Iterable
 
-from db import Schedule, TrainerSchedule
+from db import Availability, Schedule, TrainerSchedule
+from notification import send_notification
+from timezones import get_today
 from taskiq_broker import broker
+from .purge import purge_table, PurgeReport
 
 
 logger = logging.getLogger(__name__)
 
+DELIVERED_TTL = 86400  # срок хранения отметки об отправке, секунды
+
 
 @broker.task(task_name='send_scheduled_notification')
 async def send_scheduled_notification(
@@ -25,39 +30,116 @@ async def send_scheduled_notification(
 
     bot: Bot = context.broker.custom_dependency_context.get('bot')
 
+    await send_notification(bot=bot, user_id=chat_id, text=message_text)
+
+
+@broker.task(
+    task_name='send_notification',
+    retry_on_error=True,
+    max_retries=3,
+)
+async def send_notification_task(
+    user_id: int,
+    text: str,
+    context: Annotated[Context, TaskiqDepends()],
+    event_id: int | None = None,
+) -> bool:
+    """
+    Доставляет уведомление пользователю из воркера. Ошибки сети
+    приводят к повторному запуску задачи.
+
+    Уведомление из outbox (event_id) отправляется один раз, даже если
+    событие было опубликовано повторно. Отметка об отправке хранится в
+    Redis DELIVERED_TTL секунд (сутки): событие, опубликованное повторно
+    позже этого срока, будет отправлено ещё раз.
+    """
+
+    bot: Bot = context.broker.custom_dependency_context.get('bot')
+    if event_id is None:
+        return await send_notification(bot=bot, user_id=user_id, text=text)
+
+    redis: Redis = context.broker.custom_dependency_context.get('redis')
+    key = f'outbox:delivered:{event_id}'
+    if not await redis.set(key, 1, nx=True, ex=DELIVERED_TTL):
+        logger.info(
+            'Уведомление события outbox id=%s уже отправлено', event_id
+        )
+        return True
+
+    try:
+        return await send_notification(bot=bot, user_id=user_id, text=text)
+    except Exception:
+        # Отметка снимается, чтобы повтор задачи отправил сообщение.
+        await redis.delete(key)
+        raise
+
+
+async def enqueue_notification(bot: Bot, user_id: int, text: str) -> None:
+    """
+    Ставит уведомление в очередь воркера, не дожидаясь доставки.
+    Если брокер недоступен, сообщение отправляется сразу.
+    """
+
     try:
-        await bot.send_message(chat_id, message_text)
+        await send_notification_task.kiq(user_id=user_id, text=text)
+    except SendTaskError as error:
+        logger.error(
+            'Не удалось поставить уведомление user_id=%s в очередь, '
+            'отправка напрямую',
+            user_id,
+            exc_info=error,
+        )
+        await send_notification(bot=bot, user_id=user_id, text=text)
+
 
-    except TelegramForbiddenError as error:
-        logger.warning('Ошибка, сообщение не удалось отправить. %s', error)
+async def enqueue_notifications(
+    bot: Bot,
+    messages: Iterable[tuple[int, str]],
+) -> None:
+    """
+    Ставит пачку уведомлений (user_id, text) в очередь воркера.
+    """
+
+    await asyncio.gather(*(
+        enqueue_notification(bot=bot, user_id=user_id, text=text)
+        for user_id, text in messages
+    ))
 
 
 @broker.task(task_name='clear_old_data')
 async def clear_old_data(
-    context: Annotated[Context, TaskiqDepends()]
-):
+    context: Annotated[Context, TaskiqDepends()],
+    cutoff: str | None = None,
+) -> list[dict]:
+    """
+    Удаляет прошедшие записи на тренировки и расписания тренеров.
+
+    Очистка идёт порциями с фиксацией каждой из них, поэтому задачу
+    можно безопасно перезапустить после остановки воркера: повторный
+    запуск с тем же cutoff (дата в ISO-формате) удалит только то,
+    что не успели удалить ранее.
+    """
 
     session: async_sessionmaker = \
         context.broker.custom_dependency_context.get('session')
 
-    async with session() as session:
+    date_: date = (
+        date.fromisoformat(cutoff) if cutoff
+        else get_today('UTC')
+    )
 
-        date_ = datetime.now(ZoneInfo('UTC')).date()
-        stmt = (
-            select(Schedule)
-            .where(Schedule.date < date_)
+    reports: list[dict] = []
+    tables = (
+        Schedule.__table__,
+        TrainerSchedule.__table__,
+        Availability.__table__,
+    )
+    for table in tables:
+        report: PurgeReport = await purge_table(
+            session_pool=session,
+            table=table,
+            cutoff=date_,
         )
+        reports.append(report.as_dict())
 
-        result = await session.execute(stmt)
-        for schedule in result.scalars():
-            await session.delete(schedule)
-        logger.info('Устаревшие данные из таблицы Schedule очищены')
-        stmt = (
-            select(TrainerSchedule)
-            .where(TrainerSchedule.date < date_)
-        )
-        result = await session.execute(stmt)
-        for trainer_schedule in result.scalars():
-            await session.delete(trainer_schedule)
-        logger.info('Устаревшие данные из таблицы TrainerSchedule очищены')
-        await session.commit()
+    return reports
@@ -0,0 +1,140 @@
+import asyncio
+from types import SimpleNamespace
+
+from db.db_operations import get_frame_clients, LIMIT, SESSION
+
+
+TRAINER_ID = 7
+
+
+class FakeSession:
+    """
+    Сессия, возвращающая заданные строки и запоминающая запрос.
+    """
+
+    def __init__(self, rows: list[tuple]):
+
+        self.rows = rows
+        self.statements: list = []
+
+    async def execute(self, stmt):
+
+        self.statements.append(stmt)
+
+        return SimpleNamespace(all=lambda: list(self.rows))
+
+
+def make_rows(ids) -> list[tuple]:
+
+    return [
+        (
+            SimpleNamespace(id=id_, name=f'client {id_}'),
+            SimpleNamespace(workouts=id_ * 10),
+        )
+        for id_ in ids
+    ]
+
+
+def make_manager(session: FakeSession, limit: int = 3):
+
+    return SimpleNamespace(
+        dialog_data={LIMIT: limit},
+        event=SimpleNamespace(from_user=SimpleNamespace(id=TRAINER_ID)),
+        middleware_data={SESSION: session},
+    )
+
+
+def compile_statement(session: FakeSession):
+
+    compiled = session.statements[-1].compile()
+
+    return str(compiled), compiled.params
+
+
+def test_forward_page_with_more():
+
+    session = FakeSession(make_rows([4, 5, 6, 7]))
+
+    group, has_more = asyncio.run(
+        get_frame_clients(make_manager(session), cursor=3)
+    )
+
+    assert [client['id'] for client in group] == [4, 5, 6]
+    assert group[0] == {'id': 4, 'name': 'client 4', 'workouts': 40}
+    assert has_more
+
+    sql, params = compile_statement(session)
+    assert 'client.id > ' in sql
+    assert 'ORDER BY client.id\n' in sql
+    assert 3 in params.values()
+    assert params['param_1'] == 4
+
+
+def test_forward_last_page():
+
+    session = FakeSession(make_rows([8, 9]))
+
+    group, has_more = asyncio.run(
+        get_frame_clients(make_manager(session), cursor=7)
+    )
+
+    assert [client['id'] for client in group] == [8, 9]
+    assert not has_more
+
+
+def test_first_page_has_no_cursor():
+
+    session = FakeSession(make_rows([1, 2, 3]))
+
+    group, has_more = asyncio.run(get_frame_clients(make_manager(session)))
+
+    assert [client['id'] for client in group] == [1, 2, 3]
+    assert not has_more
+
+    sql, _ = compile_statement(session)
+    assert 'client.id >' not in sql
+    assert 'client.id <' not in sql
+
+
+def test_backward_page_with_more():
+
+    session = FakeSession(make_rows([9, 8, 7, 6]))
+
+    group, has_more = asyncio.run(
+        get_frame_clients(make_manager(session), cursor=10, backward=True)
+    )
+
+    assert [client['id'] for client in group] == [7, 8, 9]
+    assert has_more
+
+    sql, params = compile_statement(session)
+    assert 'client.id < ' in sql
+    assert 'ORDER BY client.id DESC' in sql
+    assert 10 in params.values()
+
+
+def test_backward_first_page():
+
+    session = FakeSession(make_rows([3, 2, 1]))
+
+    group, has_more = asyncio.run(
+        get_frame_clients(make_manager(session), cursor=4, backward=True)
+    )
+
+    assert [client['id'] for client in group] == [1, 2, 3]
+    assert not has_more
+
+
+def test_only_active_clients():
+
+    session = FakeSession([])
+
+    group, has_more = asyncio.run(
+        get_frame_clients(make_manager(session), all=False)
+    )
+
+    assert group == []
+    assert not has_more
+
+    sql, _ = compile_statement(session)
+    assert 'workout.workouts > ' in sql
@@ -0,0 +1,131 @@
+import asyncio
+
+from cache import AsyncTTLCache
+
+
+def make_cache() -> AsyncTTLCache:
+
+    return AsyncTTLCache('test', maxsize=10, ttl=60)
+
+
+def make_loader(value, calls: list, release: asyncio.Event):
+
+    async def loader():
+        calls.append(value)
+        await release.wait()
+        return value
+
+    return loader
+
+
+def test_concurrent_misses_load_once():
+
+    async def run():
+        cache = make_cache()
+        calls: list = []
+        release = asyncio.Event()
+        loader = make_loader('value', calls, release)
+
+        tasks = [
+            asyncio.create_task(cache.get_or_load('key', loader))
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await asyncio.gather(*tasks) == ['value'] * 5
+        assert calls == ['value']
+        assert cache.misses == 1
+        assert cache.hits == 4
+        assert not cache._flights
+
+    asyncio.run(run())
+
+
+def test_none_is_cached():
+
+    async def run():
+        cache = make_cache()
+        calls: list = []
+        release = asyncio.Event()
+        release.set()
+        loader = make_loader(None, calls, release)
+
+        assert await cache.get_or_load('key', loader) is None
+        assert await cache.get_or_load('key', loader) is None
+        assert calls == [None]
+
+    asyncio.run(run())
+
+
+def test_invalidate_during_load_skips_store():
+
+    async def run():
+        cache = make_cache()
+        calls: list = []
+        release = asyncio.Event()
+
+        stale = asyncio.create_task(
+            cache.get_or_load('key', make_loader('old', calls, release))
+        )
+        other = asyncio.create_task(
+            cache.get_or_load('other', make_loader('other', calls, release))
+        )
+        await asyncio.sleep(0)
+        cache.invalidate('key')
+        release.set()
+
+        assert await stale == 'old'
+        assert await other == 'other'
+
+        fresh = await cache.get_or_load(
+            'key', make_loader('new', calls, release)
+        )
+        assert fresh == 'new'
+        assert await cache.get_or_load(
+            'other', make_loader('unused', calls, release)
+        ) == 'other'
+        assert calls == ['old', 'other', 'new']
+
+    asyncio.run(run())
+
+
+def test_clear_during_load_skips_store():
+
+    async def run():
+        cache = make_cache()
+        calls: list = []
+        release = asyncio.Event()
+
+        task = asyncio.create_task(
+            cache.get_or_load('key', make_loader('old', calls, release))
+        )
+        await asyncio.sleep(0)
+        cache.clear()
+        release.set()
+
+        assert await task == 'old'
+        assert await cache.get_or_load(
+            'key', make_loader('new', calls, release)
+        ) == 'new'
+        assert calls == ['old', 'new']
+
+    asyncio.run(run())
+
+
+def test_invalidate_after_load_drops_value():
+
+    async def run():
+        cache = make_cache()
+        calls: list = []
+        release = asyncio.Event()
+        release.set()
+
+        await cache.get_or_load('key', make_loader('old', calls, release))
+        cache.invalidate('key')
+        assert await cache.get_or_load(
+            'key', make_loader('new', calls, release)
+        ) == 'new'
+        assert calls == ['old', 'new']
+
+    asyncio.run(run())
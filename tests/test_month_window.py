@@ -0,0 +1,23 @@
+from datetime import date
+
+import pytest
+
+from widgets.calendar import month_window
+
+
+@pytest.mark.parametrize(
+    'offset, window',
+    [
+        (date(2025, 5, 1), (date(2025, 4, 1), date(2025, 7, 1))),
+        (date(2025, 5, 31), (date(2025, 4, 1), date(2025, 7, 1))),
+        (date(2025, 1, 15), (date(2024, 12, 1), date(2025, 3, 1))),
+        (date(2025, 12, 31), (date(2025, 11, 1), date(2026, 2, 1))),
+        (date(2024, 2, 29), (date(2024, 1, 1), date(2024, 4, 1))),
+        (date(2025, 3, 1), (date(2025, 2, 1), date(2025, 5, 1))),
+        (date(2025, 6, 30), (date(2025, 5, 1), date(2025, 8, 1))),
+    ],
+)
+def test_month_window(offset, window):
+
+    assert month_window(offset) == window
+
@@ -0,0 +1,73 @@
+import pytest
+
+from slots import HOURS, SlotMask
+
+
+def test_from_hours_sets_bits():
+
+    slots = SlotMask.from_hours([9, 10, 12])
+
+    assert slots == (1 << 9) | (1 << 10) | (1 << 12)
+    assert slots.hours == [9, 10, 12]
+    assert len(slots) == 3
+    assert 10 in slots
+    assert 11 not in slots
+
+
+def test_from_hours_rejects_out_of_range():
+
+    with pytest.raises(ValueError):
+        SlotMask.from_hours([HOURS])
+
+    with pytest.raises(ValueError):
+        SlotMask.from_hours([-1])
+
+
+def test_mask_out_of_range():
+
+    with pytest.raises(ValueError):
+        SlotMask(SlotMask.FULL + 1)
+
+
+@pytest.mark.parametrize(
+    'value, hours',
+    [
+        ('9,10,11', [9, 10, 11]),
+        ('11,9', [9, 11]),
+        ('0,23,', [0, 23]),
+        ('', []),
+        (7680, [9, 10, 11, 12]),
+    ],
+)
+def test_parse(value, hours):
+
+    assert SlotMask.parse(value).hours == hours
+
+
+def test_start_stop_breaks():
+
+    slots = SlotMask.parse('9,10,13,15')
+
+    assert slots.start == 9
+    assert slots.stop == 15
+    assert slots.breaks == [11, 12, 14]
+    assert slots.to_str() == '9,10,13,15'
+
+
+def test_single_hour():
+
+    slots = SlotMask.from_hours([0])
+
+    assert slots.start == slots.stop == 0
+    assert slots.breaks == []
+
+
+def test_empty_mask():
+
+    slots = SlotMask()
+
+    assert not slots
+    assert slots.start is None
+    assert slots.stop is None
+    assert slots.breaks == []
+    assert slots.to_str() == ''
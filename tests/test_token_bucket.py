@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from notification import scheduler
+from notification.scheduler import TokenBucket
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+
+    clock = Clock()
+    monkeypatch.setattr(scheduler, 'monotonic', clock)
+
+    return clock
+
+
+def test_refill_by_rate(clock):
+
+    bucket = TokenBucket(rate=2.0, capacity=4.0)
+    bucket.tokens = 0
+
+    clock.now += 1.5
+    bucket._refill(clock.now)
+
+    assert bucket.tokens == pytest.approx(3.0)
+    assert bucket.updated == clock.now
+
+
+def test_refill_capped_by_capacity(clock):
+
+    bucket = TokenBucket(rate=2.0, capacity=4.0)
+    bucket.tokens = 1
+
+    clock.now += 100
+    bucket._refill(clock.now)
+
+    assert bucket.tokens == 4.0
+
+
+def test_acquire_waits_for_token(clock, monkeypatch):
+
+    sleeps: list[float] = []
+
+    async def sleep(seconds: float) -> None:
+        sleeps.append(seconds)
+        clock.now += seconds
+
+    monkeypatch.setattr(scheduler.asyncio, 'sleep', sleep)
+
+    bucket = TokenBucket(rate=4.0, capacity=1.0)
+
+    asyncio.run(bucket.acquire())
+    assert sleeps == []
+
+    asyncio.run(bucket.acquire())
+    assert sleeps == [pytest.approx(0.25)]
+    assert bucket.tokens == pytest.approx(0.0)
+
+
+def test_pause_blocks_until_deadline(clock, monkeypatch):
+
+    sleeps: list[float] = []
+
+    async def sleep(seconds: float) -> None:
+        sleeps.append(seconds)
+        clock.now += seconds
+
+    monkeypatch.setattr(scheduler.asyncio, 'sleep', sleep)
+
+    bucket = TokenBucket(rate=1.0, capacity=5.0)
+    bucket.pause(3)
+
+    assert bucket.tokens == 0
+
+    asyncio.run(bucket.acquire())
+
+    assert sleeps[0] == pytest.approx(3.0)
+    assert clock.now >= bucket.paused_until
@@ -1,4 +1,14 @@
-from .timezones import get_current_datetime, timezones
+from .clock import Clock, FakeClock, get_clock, get_zone, set_clock
+from .timezones import get_current_datetime, get_today, timezones
 
 
-__all__ = [get_current_datetime, timezones]
+__all__ = [
+    Clock,
+    FakeClock,
+    get_clock,
+    get_current_datetime,
+    get_today,
+    get_zone,
+    set_clock,
+    timezones,
+]
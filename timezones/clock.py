@@ -0,0 +1,107 @@
+from datetime import (
+    date,
+    datetime,
+    timedelta,
+    timezone as dt_timezone,
+    tzinfo,
+)
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+
+UTC = 'UTC'
+
+TimeZone = str | tzinfo | None
+
+
+@lru_cache(maxsize=None)
+def get_zone(name: str) -> ZoneInfo:
+    """
+    Возвращает объект часового пояса по имени, создавая его один раз.
+    """
+
+    return ZoneInfo(name)
+
+
+def _as_zone(timezone: TimeZone) -> tzinfo:
+
+    if timezone is None:
+        return dt_timezone.utc
+    if isinstance(timezone, str):
+        return get_zone(timezone)
+
+    return timezone
+
+
+class Clock:
+    """
+    Источник текущего времени.
+    """
+
+    def now(self, timezone: TimeZone = None) -> datetime:
+        """
+        Текущие дата и время в часовом поясе (по умолчанию UTC).
+        """
+
+        return datetime.now(_as_zone(timezone))
+
+    def today(self, timezone: TimeZone = None) -> date:
+        """
+        Текущая дата в часовом поясе (по умолчанию UTC).
+        """
+
+        return self.now(timezone).date()
+
+
+class FakeClock(Clock):
+    """
+    Управляемые часы для тестов и нагрузочных сценариев: время стоит
+    на месте, пока его не переведут методами set или advance.
+    """
+
+    def __init__(self, now: datetime):
+
+        self.set(now)
+
+    def set(self, now: datetime) -> None:
+
+        if now.tzinfo is None:
+            raise ValueError('FakeClock expects an aware datetime')
+        self._now = now.astimezone(dt_timezone.utc)
+
+    def advance(self, delta: timedelta | None = None, **kwargs) -> datetime:
+        """
+        Переводит часы вперёд на delta или timedelta(**kwargs).
+        """
+
+        self._now += delta if delta is not None else timedelta(**kwargs)
+
+        return self._now
+
+    def now(self, timezone: TimeZone = None) -> datetime:
+
+        return self._now.astimezone(_as_zone(timezone))
+
+
+_clock: Clock = Clock()
+
+
+def get_clock() -> Clock:
+    """
+    Возвращает часы, используемые приложением.
+    """
+
+    return _clock
+
+
+def set_clock(clock: Clock) -> Clock:
+    """
+    Подменяет часы приложения (например, на FakeClock) и возвращает
+    прежние, чтобы их можно было восстановить.
+    """
+
+    global _clock
+
+    previous, _clock = _clock, clock
+
+    return previous
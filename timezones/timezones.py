@@ -1,5 +1,6 @@
-from datetime import datetime
-from zoneinfo import ZoneInfo
+from datetime import date, datetime
+
+from .clock import get_clock
 
 
 timezones = (
@@ -22,5 +23,12 @@ def get_current_datetime(timezone: str) -> datetime:
     Возвращает текущую дату и время в указанном часовом поясе.
     """
 
-    tz = ZoneInfo(timezone)
-    return datetime.now(tz)
+    return get_clock().now(timezone)
+
+
+def get_today(timezone: str) -> date:
+    """
+    Возвращает текущую дату в указанном часовом поясе.
+    """
+
+    return get_clock().today(timezone)
@@ -0,0 +1,18 @@
+from .calendar import (
+    day_names,
+    ManagedWindowedCalendar,
+    MarkedCalendar,
+    month_names,
+    month_window,
+    WindowedCalendar,
+)
+
+
+__all__ = [
+    day_names,
+    ManagedWindowedCalendar,
+    MarkedCalendar,
+    month_names,
+    month_window,
+    WindowedCalendar,
+]
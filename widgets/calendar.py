@@ -0,0 +1,299 @@
+from aiogram.types import CallbackQuery, InlineKeyboardButton
+from aiogram_dialog import DialogManager
+from aiogram_dialog.api.protocols import DialogProtocol
+from aiogram_dialog.widgets.common import WhenCondition
+from aiogram_dialog.widgets.kbd import (
+    Calendar,
+    CalendarScope,
+    ManagedCalendar,
+)
+from aiogram_dialog.widgets.kbd.calendar_kbd import (
+    CalendarConfig,
+    CalendarDaysView,
+    CalendarMonthView,
+    CalendarScopeView,
+    CalendarUserConfig,
+    CalendarYearsView,
+    empty_button,
+    month_begin,
+    next_month_begin,
+    prev_month_begin,
+    raw_from_date,
+)
+from aiogram_dialog.widgets.text import Format, Text
+from aiogram_dialog.widgets.widget_event import (
+    ensure_event_processor,
+    WidgetEventProcessor,
+)
+from babel.dates import get_day_names, get_month_names
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Union
+
+from timezones import get_clock, get_zone
+
+
+DATE = 'date'
+LOCALES_MAXSIZE = 64  # количество локалей с закэшированными названиями
+TIME_ZONE = 'time_zone'
+WINDOW = 'window'
+
+
+# Возвращает отметки дней календаря {'2025-12-12': '🟢', ...}.
+DayMarker = Callable[[DialogManager, date], dict[str, str]]
+OnMonthChanged = Callable[
+    [CallbackQuery, ManagedCalendar, DialogManager, date],
+    Awaitable[Any],
+]
+
+
+@lru_cache(maxsize=LOCALES_MAXSIZE)
+def day_names(locale: str | None) -> tuple[str, ...]:
+    """
+    Короткие названия дней недели локали, начиная с понедельника.
+    """
+
+    names = get_day_names(width='short', context='stand-alone', locale=locale)
+
+    return tuple(names[day].title() for day in range(7))
+
+
+@lru_cache(maxsize=LOCALES_MAXSIZE)
+def month_names(locale: str | None) -> tuple[str, ...]:
+    """
+    Названия месяцев локали, индекс совпадает с номером месяца.
+    """
+
+    names = get_month_names('wide', context='stand-alone', locale=locale)
+
+    return ('', *(names[month].title() for month in range(1, 13)))
+
+
+class WeekDay(Text):
+
+    async def _render_text(self, data, dialog_manager: DialogManager) -> str:
+
+        locale = dialog_manager.event.from_user.language_code
+
+        return day_names(locale)[data[DATE].weekday()]
+
+
+class Month(Text):
+
+    async def _render_text(self, data, dialog_manager: DialogManager) -> str:
+
+        locale = dialog_manager.event.from_user.language_code
+
+        return month_names(locale)[data[DATE].month]
+
+
+class MarkedDaysView(CalendarDaysView):
+    """
+    Представление дней месяца, строящее всю сетку за один проход.
+
+    Отметки дней запрашиваются у marker один раз на отрисовку вместо
+    отдельного рендера текстового виджета для каждой ячейки.
+    """
+
+    def __init__(self, callback_generator, marker: DayMarker, **kwargs):
+
+        super().__init__(callback_generator, **kwargs)
+        self.marker = marker
+
+    async def _render_days(
+            self,
+            config: CalendarConfig,
+            offset: date,
+            data: dict,
+            manager: DialogManager,
+    ) -> list[list[InlineKeyboardButton]]:
+
+        month_start: date = month_begin(offset)
+        month_end: date = next_month_begin(offset) - timedelta(days=1)
+        min_date: date = max(config.min_date, month_start)
+        max_date: date = min(config.max_date, month_end)
+
+        start_date: date = month_start - timedelta(
+            days=(month_start.weekday() - config.firstweekday) % 7
+        )
+        end_date: date = month_end + timedelta(
+            days=(config.firstweekday - month_end.weekday() - 1) % 7
+        )
+
+        today: date = get_clock().today(config.timezone)
+        marks: dict[str, str] = self.marker(manager, today)
+
+        keyboard: list[list[InlineKeyboardButton]] = []
+        current_date: date = start_date
+        while current_date <= end_date:
+            row: list[InlineKeyboardButton] = []
+            for _ in range(7):
+                if min_date <= current_date <= max_date:
+                    text: str | None = marks.get(current_date.isoformat())
+                    if text is None:
+                        text = f'[ {current_date.day:02} ]' \
+                            if current_date == today \
+                            else f'{current_date.day:02}'
+                    row.append(InlineKeyboardButton(
+                        text=text,
+                        callback_data=self.callback_generator(
+                            str(raw_from_date(current_date))
+                        ),
+                    ))
+                else:
+                    row.append(empty_button())
+                current_date += timedelta(days=1)
+            keyboard.append(row)
+
+        return keyboard
+
+
+def month_window(offset: date) -> tuple[date, date]:
+    """
+    Возвращает полуинтервал [date_from, date_to) из месяца offset и
+    соседних с ним: данные предыдущего и следующего месяцев загружаются
+    заранее, чтобы переход на них не ждал базы данных.
+    """
+
+    return (
+        prev_month_begin(offset),
+        next_month_begin(next_month_begin(offset)),
+    )
+
+
+class WindowedCalendar(Calendar):
+    """
+    Календарь, сообщающий о выходе за загруженное окно месяцев.
+
+    Обработчик, загрузивший данные для окна month_window, отмечает его
+    центр методом set_window; пока окно не отмечено, центром считается
+    месяц до навигации. Если после навигации (листание, выбор месяца или
+    года) отображаемый месяц выходит за окно, вызывается on_month_changed
+    с началом нового месяца, чтобы обработчик загрузил данные для нового
+    окна.
+    """
+
+    def __init__(
+            self,
+            id: str,
+            on_click: Union[Callable, WidgetEventProcessor, None] = None,
+            on_month_changed: Union[
+                OnMonthChanged, WidgetEventProcessor, None
+            ] = None,
+            config: CalendarConfig | None = None,
+            when: WhenCondition = None,
+    ) -> None:
+
+        super().__init__(id=id, on_click=on_click, config=config, when=when)
+        self.on_month_changed = ensure_event_processor(on_month_changed)
+
+    async def _process_item_callback(
+            self,
+            callback: CallbackQuery,
+            data: str,
+            dialog: DialogProtocol,
+            manager: DialogManager,
+    ) -> bool:
+
+        before: date | None = self.get_offset(manager)
+        result: bool = await super()._process_item_callback(
+            callback, data, dialog, manager,
+        )
+        offset: date | None = self.get_offset(manager)
+        if offset is None or offset == before:
+            return result
+
+        window: date | None = self.get_window(manager) or before
+        if window is not None:
+            date_from, date_to = month_window(window)
+            if date_from <= offset < date_to:
+                return result
+
+        await self.on_month_changed.process_event(
+            callback,
+            self.managed(manager),
+            manager,
+            month_begin(offset),
+        )
+
+        return result
+
+    def get_window(self, manager: DialogManager) -> date | None:
+        """
+        Возвращает центр загруженного окна месяцев.
+        """
+
+        window: str | None = self.get_widget_data(manager, {}).get(WINDOW)
+
+        return date.fromisoformat(window) if window else None
+
+    def set_window(self, offset: date, manager: DialogManager) -> None:
+        """
+        Отмечает загруженным окно month_window вокруг месяца offset.
+        """
+
+        data: dict = self.get_widget_data(manager, {})
+        data[WINDOW] = month_begin(offset).isoformat()
+
+    def managed(self, manager: DialogManager) -> 'ManagedWindowedCalendar':
+
+        return ManagedWindowedCalendar(self, manager)
+
+
+class ManagedWindowedCalendar(ManagedCalendar):
+
+    def get_window(self) -> date | None:
+
+        return self.widget.get_window(self.manager)
+
+    def set_window(self, offset: date) -> None:
+
+        return self.widget.set_window(offset, self.manager)
+
+
+class MarkedCalendar(WindowedCalendar):
+    """
+    Календарь тренировок с локализованными названиями, отметками дней
+    и часовым поясом из start_data. Наследники определяют отметки
+    методом _mark_days.
+    """
+
+    def _init_views(self) -> dict[CalendarScope, CalendarScopeView]:
+
+        return {
+            CalendarScope.DAYS: MarkedDaysView(
+                self._item_callback_data,
+                marker=self._mark_days,
+                header_text='~~~~~ ' + Month() + ' ~~~~~',
+                weekday_text=WeekDay(),
+                next_month_text=Month() + ' >>',
+                prev_month_text='<< ' + Month(),
+            ),
+            CalendarScope.MONTHS: CalendarMonthView(
+                self._item_callback_data,
+                month_text=Month(),
+                header_text='~~~~~ ' + Format('{date:%Y}') + ' ~~~~~',
+                this_month_text='[' + Month() + ']',
+            ),
+            CalendarScope.YEARS: CalendarYearsView(
+                self._item_callback_data,
+            ),
+        }
+
+    def _mark_days(
+            self,
+            manager: DialogManager,
+            today: date,
+    ) -> dict[str, str]:
+
+        return {}
+
+    async def _get_user_config(
+            self,
+            data: dict,
+            manager: DialogManager,
+    ) -> CalendarUserConfig:
+
+        tz = get_zone(manager.start_data.get(TIME_ZONE))
+
+        return CalendarUserConfig(timezone=tz)